@@ -1,6 +1,6 @@
 from src.drawing import stddraw
 from src.entities.uav_entities import Environment
-from src.utilities import config, utilities
+from src.utilities import utilities
 from collections import defaultdict
 
 #printer the environment 
@@ -80,7 +80,7 @@ class PathPlanningDrawer():
         self.__draw_sensing_range(drone)
         self.__reset_pen()
 
-        if config.IS_SHOW_NEXT_TARGET_VEC:
+        if self.simulator.config.is_show_next_target_vec:
             self.__draw_next_target(drone.coords, drone.next_target())
 
     def update(self, rate=1, 
@@ -90,7 +90,7 @@ class PathPlanningDrawer():
         if self.borders:
             self.__borders_plot()
 
-        if config.ENABLE_PROBABILITIES:
+        if self.simulator.config.enable_probabilities:
             self.__grid_plot()
         if show:
             stddraw.show(rate)
@@ -0,0 +1,221 @@
+import numpy as np
+
+from src.entities.uav_entities import Drone
+
+"""
+This file contains the struct-of-arrays engine for the drones. All the dynamic state of the drones (positions,
+current waypoints, speeds and routing flags) is kept in numpy arrays and every drone is moved with a single
+batched interpolation per step. The Drone objects become thin views (DroneView) over these arrays.
+
+The drones fly the very same coordinates of Drone.move, to the last bit: the distances are computed with the same
+pow calls of utilities.euclidean_distance and the interpolation does the same floating point operations. The drones route
+first and then move all together, the results are those of the stepped engine as long as the routing of a drone
+does not read the current position of the other drones (the routing algorithms read it from the hello packets).
+
+Enable it with src.utilities.config.VECTORIZED_DRONES.
+"""
+
+
+class DronesState:
+    """ The dynamic state of all the drones of a simulation, one row per drone (row i -> drone i). """
+
+    def __init__(self, paths: list, simulator):
+        """ paths: list of mission paths (list of waypoints), one per drone """
+        self.simulator = simulator
+        self.n_drones = len(paths)
+        self.depot_coords = np.asarray(simulator.depot_coordinates, dtype=float)
+
+        # the mission paths, padded to the longest one
+        self.paths_len = np.array([len(path) for path in paths], dtype=int)
+        self.paths = np.zeros((self.n_drones, self.paths_len.max(), 2), dtype=float)
+        for i, path in enumerate(paths):
+            self.paths[i, :len(path)] = path
+
+        self.coords = self.paths[:, 0].copy()
+        self.coords_tuples = [path[0] for path in paths]  # the coords as tuples, to avoid conversions at each read
+        self.speed = np.full(self.n_drones, simulator.drone_speed, dtype=float)
+        self.current_waypoint = np.zeros(self.n_drones, dtype=int)
+        self.move_routing = np.zeros(self.n_drones, dtype=bool)
+        self.last_move_routing = np.zeros(self.n_drones, dtype=bool)
+        self.come_back_to_mission = np.zeros(self.n_drones, dtype=bool)
+        self.last_mission_coords = np.full((self.n_drones, 2), np.nan)
+        self.drones = np.arange(self.n_drones)
+
+    def set_coords(self, drone_id, coords):
+        self.coords[drone_id] = coords
+        self.coords_tuples[drone_id] = coords
+
+    def move(self, time):
+        """ Move all the drones at once, with the same semantic of Drone.move. The drones doing move routing
+            go towards the depot, the others go towards their next mission waypoint (or back to the mission).
+
+            time -> time_step_duration (how much time between two simulation frame)
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.__step(time)
+        self.coords_tuples = list(map(tuple, self.coords.tolist()))
+
+    def fly(self, steps, time):
+        """ Move all the drones as `steps` calls of move would do, with nothing happening in between (no routing).
+
+            time -> time_step_duration (how much time between two simulation frame)
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.move_routing.any() or self.last_move_routing.any() or self.come_back_to_mission.any():
+                for _ in range(steps):
+                    self.__step(time)
+            else:
+                self.__fly_mission(steps, time)
+        self.coords_tuples = list(map(tuple, self.coords.tolist()))
+
+    def __fly_mission(self, steps, time):
+        """ fly, when all the drones are on their mission: the steps of __step without the routing """
+        coords, waypoint = self.coords, self.current_waypoint
+        last_waypoint = self.paths_len - 1
+        distance = time * self.speed
+        stopped = distance == 0
+        for _ in range(steps):
+            waypoint[waypoint >= last_waypoint] = -1
+            targets = self.paths[self.drones, waypoint + 1]
+            squares = np.float_power(targets - coords, 2)
+            all_distance = np.float_power(squares[:, 0] + squares[:, 1], 0.5)
+            t = distance / all_distance
+            reached = (t >= 1) | (all_distance == 0) | stopped
+            coords = np.where(reached[:, None], targets, (1 - t[:, None]) * coords + t[:, None] * targets)
+            waypoint += reached
+        self.coords = coords
+
+        metrics = self.simulator.metrics
+        metrics.time_on_mission += steps * self.n_drones
+
+    def __step(self, time):
+        """ one step of move, the coordinates as tuples are not updated """
+        metrics = self.simulator.metrics
+        routing = self.move_routing.copy()
+        mission = ~routing
+
+        # metrics: number of time steps on active routing (movement) and on mission
+        metrics.time_on_active_routing += int(np.count_nonzero(routing | self.come_back_to_mission))
+        metrics.time_on_mission += int(np.count_nonzero(mission))
+
+        # first time that we are doing move-routing -> save where we left the mission
+        first_routing = routing & ~self.last_move_routing
+        self.last_mission_coords[first_routing] = self.coords[first_routing]
+
+        # coming back to the mission
+        self.come_back_to_mission |= mission & self.last_move_routing
+
+        # reached the end of the path, start back to 0
+        self.current_waypoint[mission & (self.current_waypoint >= self.paths_len - 1)] = -1
+
+        next_waypoint = self.paths[self.drones, np.minimum(self.current_waypoint + 1, self.paths_len - 1)]
+        back_to_mission = mission & self.come_back_to_mission
+        targets = np.where(back_to_mission[:, None], self.last_mission_coords, next_waypoint)
+        targets[routing] = self.depot_coords
+
+        # the distances as utilities.euclidean_distance computes them: float_power calls pow as python's ** does,
+        # np.sqrt, np.square and np.power may round differently and the drones would fly other coordinates
+        squares = np.float_power(targets - self.coords, 2)
+        all_distance = np.float_power(squares[:, 0] + squares[:, 1], 0.5)
+        distance = time * self.speed
+        t = distance / all_distance
+
+        # move routing on the depot -> stop move routing
+        on_depot = routing & (all_distance == 0)
+        self.move_routing[on_depot] = False
+
+        # with the next step the drones would surpass their targets
+        reached = (t >= 1) | (mission & ((all_distance == 0) | (distance == 0)))
+        reached &= ~on_depot
+        moving = ~reached & ~on_depot
+
+        new_coords = self.coords.copy()
+        new_coords[moving] = ((1 - t[moving, None]) * self.coords[moving] + t[moving, None] * targets[moving])
+        new_coords[reached] = targets[reached]
+
+        # waypoint reached, either the mission one or the one to come back to the mission
+        reached_mission = reached & mission
+        self.come_back_to_mission[reached_mission & back_to_mission] = False
+        self.current_waypoint[reached_mission & ~back_to_mission] += 1
+
+        self.coords = new_coords
+
+        # set the last move routing
+        self.last_move_routing = self.move_routing.copy()
+
+    def next_target(self, drone_id):
+        """ the point towards which the next move will fly the drone, as in move """
+        if self.move_routing[drone_id]:
+            return tuple(self.depot_coords.tolist())
+        if self.come_back_to_mission[drone_id] or self.last_move_routing[drone_id]:
+            return tuple(self.last_mission_coords[drone_id].tolist())
+
+        waypoint = int(self.current_waypoint[drone_id])
+        if waypoint >= self.paths_len[drone_id] - 1:
+            waypoint = -1
+        return tuple(self.paths[drone_id, waypoint + 1].tolist())
+
+
+class DroneView(Drone):
+    """ A Drone whose dynamic state is stored in a DronesState, it behaves exactly as a Drone. """
+
+    def __init__(self, identifier: int, path: list, depot, simulator, drones_state: DronesState):
+        self.drones_state = drones_state
+        super().__init__(identifier, path, depot, simulator)
+
+    @property
+    def coords(self):
+        return self.drones_state.coords_tuples[self.identifier]
+
+    @coords.setter
+    def coords(self, coords):
+        self.drones_state.set_coords(self.identifier, coords)
+
+    @property
+    def speed(self):
+        return float(self.drones_state.speed[self.identifier])
+
+    @speed.setter
+    def speed(self, speed):
+        self.drones_state.speed[self.identifier] = speed
+
+    @property
+    def current_waypoint(self):
+        return int(self.drones_state.current_waypoint[self.identifier])
+
+    @current_waypoint.setter
+    def current_waypoint(self, current_waypoint):
+        self.drones_state.current_waypoint[self.identifier] = current_waypoint
+
+    @property
+    def move_routing(self):
+        return bool(self.drones_state.move_routing[self.identifier])
+
+    @move_routing.setter
+    def move_routing(self, move_routing):
+        self.drones_state.move_routing[self.identifier] = move_routing
+
+    @property
+    def last_move_routing(self):
+        return bool(self.drones_state.last_move_routing[self.identifier])
+
+    @last_move_routing.setter
+    def last_move_routing(self, last_move_routing):
+        self.drones_state.last_move_routing[self.identifier] = last_move_routing
+
+    @property
+    def come_back_to_mission(self):
+        return bool(self.drones_state.come_back_to_mission[self.identifier])
+
+    @come_back_to_mission.setter
+    def come_back_to_mission(self, come_back_to_mission):
+        self.drones_state.come_back_to_mission[self.identifier] = come_back_to_mission
+
+    @property
+    def last_mission_coords(self):
+        coords = self.drones_state.last_mission_coords[self.identifier]
+        return None if np.isnan(coords[0]) else tuple(coords.tolist())
+
+    @last_mission_coords.setter
+    def last_mission_coords(self, coords):
+        self.drones_state.last_mission_coords[self.identifier] = (np.nan, np.nan) if coords is None else coords
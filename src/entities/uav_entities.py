@@ -1,12 +1,17 @@
+import heapq
+import math
+
 import numpy as np
 
-from src.utilities import config, utilities
+from src.utilities import utilities
 
 
 class SimulatedEntity:
     """ A simulated entity keeps track of the simulation object, where you can access all the parameters
     of the simulation. No class of this type is directly instantiable.
     """
+    __slots__ = ("simulator",)
+
     def __init__(self, simulator):
         self.simulator = simulator
 
@@ -14,6 +19,7 @@ class SimulatedEntity:
 # ------------------ Entities ----------------------
 class Entity(SimulatedEntity):
     """ An entity in the environment, e.g. Drone, Event, Packet. It extends SimulatedEntity. """
+    __slots__ = ("identifier", "coords")
 
     def __init__(self, identifier: int, coords: tuple, simulator):
         super().__init__(simulator)
@@ -21,8 +27,8 @@ class Entity(SimulatedEntity):
         self.coords = coords          # the coordinates of the entity on the map
 
     def __eq__(self, other):
-        """ Entity objects are identified by their id. """
-        if not isinstance(other, Entity):
+        """ Entity objects are identified by their id, within the same type of entity. """
+        if type(other) is not type(self):
             return False
         else:
             return other.identifier == self.identifier
@@ -35,9 +41,13 @@ class Entity(SimulatedEntity):
 # Created in feel_event, not a big deal
 class Event(Entity):
     """ An event is any kind of event that the drone detects on the aoi. It is an Entity. """
+    __slots__ = ("current_time", "deadline")
+
     def __init__(self, coords: tuple, current_time: int, simulator, deadline=None):
 
-        super().__init__(id(self), coords, simulator)
+        # the event not associated to a simulation (NO_EVENT) has id -1
+        identifier = simulator.event_ids.next() if simulator is not None else -1
+        super().__init__(identifier, coords, simulator)
         self.current_time = current_time
 
         # One can specify the deadline or just consider as deadline now + EVENTS_DURATION
@@ -48,7 +58,7 @@ class Event(Entity):
         # add metrics: all the events generated during the simulation
         # GENERATED_EVENTS
         if not coords == (-1, -1) and not current_time == -1:
-            self.simulator.metrics.events.add(self)
+            self.simulator.metrics.event_generated(self)
 
     def to_json(self):
         """ return the json repr of the obj """
@@ -77,30 +87,36 @@ class Event(Entity):
         return "Ev id:" + str(self.identifier) + " c:" + str(self.coords)
 
 
+# the event of the packets not associated to an event (e.g. hello, ack), shared by all of them
+NO_EVENT = Event((-1, -1), -1, None, deadline=-1)
+
+
 # ------------------ Packet ----------------------
 class Packet(Entity):
     """ A packet is an object created out of an event monitored on the aoi. """
+    __slots__ = ("time_step_creation", "event_ref", "__TTL", "number_retransmission_attempt", "last_2_hops",
+                 "optional_data", "time_delivery", "is_move_packet")
+
     def __init__(self, time_step_creation, simulator, event_ref: Event = None):
         """ the event associated to the packet, time step in which the packet was created
          as for now, every packet is an event. """
 
-        event_ref_crafted = event_ref if event_ref is not None else Event((-1, -1), -1, simulator)  # default event if packet is not associated to the event
+        event_ref_crafted = event_ref if event_ref is not None else NO_EVENT  # default event if packet is not associated to the event
 
-        # id(self) is the id of this instance (unique for every new created packet),
-        # the coordinates are those of the event
-        super().__init__(id(self), event_ref_crafted.coords, simulator)
+        # the id is unique for every new created packet of the simulation,
+        # the coordinates are those of the event. The control packets don't keep the simulator
+        super().__init__(simulator.packet_ids.next(), event_ref_crafted.coords, simulator if event_ref is not None else None)
 
         self.time_step_creation = time_step_creation
         self.event_ref = event_ref_crafted
         self.__TTL = -1  # TTL is the number of hops that the packet crossed
-        self.__max_TTL = self.simulator.packets_max_ttl
         self.number_retransmission_attempt = 0
 
         # self.hops = set()  # All the drones that have received/transmitted the packets
         self.last_2_hops = []
         # add metrics: all the packets generated by the drones, either delivered or not (union of all the buffers)
         if event_ref is not None:
-            self.add = self.simulator.metrics.drones_packets.add(self)
+            self.simulator.metrics.packet_generated(self)
 
         self.optional_data = None  # list
         self.time_delivery = None
@@ -142,7 +158,7 @@ class Packet(Entity):
 
     def is_expired(self, cur_step):
         """ a packet expires if the deadline of the event expires, or the maximum TTL is reached """
-        return cur_step > self.event_ref.deadline  # or self.__TTL > self.__max_TTL  # TODO: questionable
+        return cur_step > self.event_ref.deadline  # or self.__TTL > self.simulator.packets_max_ttl  # TODO: questionable
 
     def __repr__(self):
         packet_type = str(self.__class__).split(".")[-1].split("'")[0]
@@ -155,11 +171,15 @@ class Packet(Entity):
 
 class DataPacket(Packet):
     """ Basically a Packet"""
+    __slots__ = ()
+
     def __init__(self, time_step_creation, simulator, event_ref: Event = None):
         super().__init__(time_step_creation, simulator, event_ref)
 
 
 class ACKPacket(Packet):
+    __slots__ = ("acked_packet", "src_drone", "dst_drone")
+
     def __init__(self, src_drone, dst_drone, simulator, acked_packet, time_step_creation=None):
         super().__init__(time_step_creation, simulator, None)
         self.acked_packet = acked_packet  # packet that the drone who creates it wants to ACK
@@ -168,8 +188,11 @@ class ACKPacket(Packet):
         self.src_drone = src_drone
         self.dst_drone = dst_drone
 
+
 class HelloPacket(Packet):
     """ The hello message is responsible to give info about neighborhood """
+    __slots__ = ("cur_pos", "speed", "next_target", "src_drone")
+
     def __init__(self, src_drone, time_step_creation, simulator, cur_pos, speed, next_target):
         super().__init__(time_step_creation, simulator, None)
         self.cur_pos = cur_pos
@@ -183,7 +206,7 @@ class Depot(Entity):
     """ The depot is an Entity. """
     def __init__(self, coords, communication_range, simulator):
 
-        super().__init__(id(self), coords, simulator)
+        super().__init__(-1, coords, simulator)  # the drones have ids 0...n_drones-1
         self.communication_range = communication_range
 
         self.__buffer = list()          # also with duplicated packets
@@ -199,11 +222,69 @@ class Depot(Entity):
 
         for pck in packets_to_offload:
             # add metrics: all the packets notified to the depot
-            self.simulator.metrics.drones_packets_to_depot.add((pck, cur_step))
-            self.simulator.metrics.drones_packets_to_depot_list.append((pck, cur_step))
+            self.simulator.metrics.packet_delivered(pck, cur_step)
             pck.time_delivery = cur_step
 
 
+# ------------------ Packet Buffer ----------------------
+class PacketBuffer:
+    """ The buffer of a drone, it holds at most one packet per event. The packets are kept in a dict keyed by
+        the event id, in insertion order (the order in which they are sent), and in a min-heap on the deadlines
+        of the events, lazily cleaned, for the expiration and the tightest deadline.
+    """
+
+    def __init__(self):
+        self.packets = {}   # { event id : packet }
+        self.deadlines = []  # heap of (deadline, insertion seq, event id, packet), may contain removed packets
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.packets)
+
+    def __contains__(self, packet):
+        """ True if the packet itself (not just one of the same event) is in the buffer """
+        return self.packets.get(packet.event_ref.identifier) == packet
+
+    def add(self, packet):
+        event_id = packet.event_ref.identifier
+        self.packets[event_id] = packet
+        heapq.heappush(self.deadlines, (packet.event_ref.deadline, self.seq, event_id, packet))
+        self.seq += 1
+
+    def is_known(self, packet):
+        """ True if there is a packet referred to the same event """
+        return packet.event_ref.identifier in self.packets
+
+    def remove(self, packet):
+        del self.packets[packet.event_ref.identifier]
+
+    def clear(self):
+        self.packets = {}
+        self.deadlines = []
+
+    def all_packets(self):
+        return list(self.packets.values())
+
+    def __is_valid(self, entry):
+        return self.packets.get(entry[2]) is entry[3]
+
+    def remove_expired(self, cur_step):
+        """ removes the packets whose event deadline is before cur_step, returns how many were removed """
+        n_removed = 0
+        while self.deadlines and self.deadlines[0][0] < cur_step:
+            entry = heapq.heappop(self.deadlines)
+            if self.__is_valid(entry):
+                del self.packets[entry[2]]
+                n_removed += 1
+        return n_removed
+
+    def tightest_deadline(self):
+        """ the closest deadline of the events in the buffer, nan if the buffer is empty """
+        while self.deadlines and not self.__is_valid(self.deadlines[0]):
+            heapq.heappop(self.deadlines)
+        return self.deadlines[0][0] if self.deadlines else np.nan
+
+
 # ------------------ Drone ----------------------
 class Drone(Entity):
 
@@ -225,7 +306,7 @@ class Drone(Entity):
         self.tightest_event_deadline = None  # used later to check if there is an event that is about to expire
         self.current_waypoint = 0
 
-        self.__buffer = []               # contains the packets
+        self.__buffer = PacketBuffer()   # contains the packets
 
         self.distance_from_depot = 0
         self.move_routing = False        # if true, it moves to the depot
@@ -238,21 +319,16 @@ class Drone(Entity):
         # last mission coord to restore the mission after movement
         self.last_mission_coords = None
 
+        # the precomputed trajectory of the mission, at the speed it was computed for
+        self.trajectory = None
+        self.trajectory_speed = None
+
 
     def update_packets(self, cur_step):
         """ removes the expired packets from the buffer
         """
-        to_remove_packets = 0
-        tmp_buffer = []
-        self.tightest_event_deadline = np.nan
-
-        for pck in self.__buffer:
-            if not pck.is_expired(cur_step):
-                tmp_buffer.append(pck)  # append again only if it is not expired
-                self.tightest_event_deadline = np.nanmin([self.tightest_event_deadline, pck.event_ref.deadline])
-            else:
-                to_remove_packets += 1
-        self.__buffer = tmp_buffer
+        self.__buffer.remove_expired(cur_step)
+        self.tightest_event_deadline = self.__buffer.tightest_deadline()
 
         if self.buffer_length() == 0:
             self.move_routing = False
@@ -289,6 +365,48 @@ class Drone(Entity):
         else:
             return (((1 - t) * p0[0] + t * p1[0]), ((1 - t) * p0[1] + t * p1[1]))
 
+    def mission_trajectory(self):
+        """ the precomputed trajectory of the mission path (see src.utilities.trajectory), at the current speed """
+        if self.trajectory is None or self.trajectory_speed != self.speed:
+            self.trajectory = self.simulator.path_manager.trajectory(self.path, self.simulator, self.speed)
+            self.trajectory_speed = self.speed
+        return self.trajectory
+
+    def future_position(self, steps):
+        """ the predicted position (x, y) of the drone after the given steps, if it keeps doing what it does now:
+            flying its mission, going back to the mission or going to the depot (where it stops)
+        """
+        distance = self.simulator.time_step_duration * self.speed
+        if distance == 0:
+            return self.coords
+
+        trajectory = self.mission_trajectory()
+        segment = self.current_waypoint % len(trajectory)  # the segment of the mission the drone is flying
+
+        # the points the drone flies straight to, before the next waypoint of the mission
+        targets = []
+        if self.move_routing:
+            targets.append(self.depot.coords)
+        else:
+            if self.come_back_to_mission:
+                targets.append(self.last_mission_coords)
+            targets.append(tuple(trajectory.ends[segment].tolist()))
+
+        p0 = self.coords
+        for p1 in targets:
+            # the drone stops on p1 with its last move towards it
+            all_distance = utilities.euclidean_distance(p0, p1)
+            to_p1 = max(1, math.ceil(all_distance / distance))
+            if steps < to_p1:
+                t = steps * distance / all_distance if all_distance > 0 else 1
+                return (((1 - t) * p0[0] + t * p1[0]), ((1 - t) * p0[1] + t * p1[1]))
+            steps -= to_p1
+            p0 = p1
+
+        if self.move_routing:
+            return p0  # on the depot
+        return trajectory.position(trajectory.first_steps[segment + 1] + steps)
+
     def feel_event(self, cur_step):
         """ feel a new event, and adds the packet relative to it, in its buffer.
             if the drones is doing movement the packet is not added in the buffer
@@ -296,9 +414,9 @@ class Drone(Entity):
         ev = Event(self.coords, cur_step, self.simulator)  # the event
         pk = ev.as_packet(cur_step, self)                  # the packet of the event
         if not self.move_routing and not self.come_back_to_mission:
-            self.__buffer.append(pk)
+            self.__buffer.add(pk)
         else:  # store the events that are missing due to movement routing
-            self.simulator.metrics.events_not_listened.add(ev)
+            self.simulator.metrics.event_not_listened(ev)
 
     def accept_packets(self, packets):
         """ Self drone adds packets of another drone, when it feels it passing by. """
@@ -308,11 +426,11 @@ class Drone(Entity):
             # because they have already been notified by someone already
 
             if not self.is_known_packet(packet):
-                self.__buffer.append(packet)
+                self.__buffer.add(packet)
 
     def routing(self, drones, depot, cur_step):
         """ do the routing """
-        self.distance_from_depot = utilities.euclidean_distance(self.depot.coords, self.coords)
+        self.distance_from_depot = self.simulator.geometry.depot_distance(self.identifier)
         self.routing_algorithm.routing(depot, drones, cur_step)
 
     def move(self, time):
@@ -348,16 +466,13 @@ class Drone(Entity):
 
     def is_known_packet(self, packet: DataPacket):
         """ Returns True if drone has already a similar packet (i.e., referred to the same event).  """
-        for pk in self.__buffer:
-            if pk.event_ref == packet.event_ref:
-                return True
-        return False
+        return self.__buffer.is_known(packet)
 
     def empty_buffer(self):
-        self.__buffer = []
+        self.__buffer.clear()
 
     def all_packets(self):
-        return self.__buffer
+        return self.__buffer.all_packets()
 
     def buffer_length(self):
         return len(self.__buffer)
@@ -367,7 +482,7 @@ class Drone(Entity):
         for packet in packets:
             if packet in self.__buffer:
                 self.__buffer.remove(packet)
-                if config.DEBUG:
+                if self.simulator.config.debug:
                     print("ROUTING del: drone: " + str(self.identifier) + " - removed a packet id: " + str(packet.identifier))
 
     def next_target(self):
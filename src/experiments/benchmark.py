@@ -0,0 +1,201 @@
+from src.utilities import config
+from src.utilities import utilities as util
+from argparse import ArgumentParser
+from ast import literal_eval
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+"""
+This file contains the scaling benchmark of the simulator core: fixed-seed, headless simulations of several swarm
+sizes, on a dense and on a sparse area, with every routing algorithm. Each scenario runs in a fresh python process,
+so that its peak memory is its own, and reports:
+    steps/sec, peak RSS, the size of the medium queue (packets waiting on the medium) and the control packets per step.
+The startup of a headless Simulator (a fresh python that imports and builds it) is measured too, against
+STARTUP_TARGET_SECONDS: the workers of the campaigns pay it at every job.
+The results are saved in config.BENCHMARKS_DIR and compared with a saved baseline, if any.
+
+e.g. python -m src.experiments.benchmark -nd 5 50 200 -steps 1000 -save_baseline
+     python -m src.experiments.benchmark -nd 5 50 200 -steps 1000 -cfg DISCRETE_EVENTS=True
+"""
+
+BASELINE_NAME = "baseline.json"
+SIZES = [5, 50, 200, 1000]
+AREAS = {"dense": config.ENV_WIDTH, "sparse": 4 * config.ENV_WIDTH}  # the edge of the area, in meters
+SEED = 1
+STARTUP_TARGET_SECONDS = 1.0  # the startup of a headless Simulator, in a fresh python
+STARTUP_CODE = """
+import time
+start = time.perf_counter()
+from src.simulation.simulator import Simulator  # first, as src.main does: it must not depend on the config being loaded
+from src.utilities import config
+{overrides}
+Simulator(show_plot=False)
+print(time.perf_counter() - start)
+"""
+
+
+def scenarios(n_drones_list, areas, algorithms, steps):
+    """ the scenarios of the benchmark, the smallest ones first """
+    return [{"n_drones": n_drones, "area": area, "algorithm": algorithm, "steps": steps}
+            for n_drones in sorted(n_drones_list) for area in areas for algorithm in algorithms]
+
+
+def scenario_key(scenario):
+    return scenario["algorithm"] + "-" + scenario["area"] + "-" + str(scenario["n_drones"])
+
+
+def run_scenario(scenario, overrides):
+    """ run the scenario in this process and return its measures """
+    for name, value in overrides.items():
+        setattr(config, name, value)
+
+    from src.simulation.simulator import Simulator
+
+    edge = AREAS[scenario["area"]]
+    start = time.perf_counter()
+    simulation = Simulator(len_simulation=scenario["steps"], n_drones=scenario["n_drones"], seed=SEED,
+                           env_width=edge, env_height=edge, depot_coordinates=(edge / 2, 0),
+                           routing_algorithm=config.RoutingAlgorithm[scenario["algorithm"]],
+                           show_plot=False)
+    setup_seconds = time.perf_counter() - start
+
+    # the packets waiting on the medium, sampled at each run of the medium
+    dispatcher = simulation.network_dispatcher
+    queue_sizes = []
+    run_medium = dispatcher.run_medium
+
+    def sampled_run_medium(current_ts):
+        queue_sizes.append(sum(len(packets) for packets in dispatcher.packets.values()))
+        run_medium(current_ts)
+
+    dispatcher.run_medium = sampled_run_medium
+
+    start = time.perf_counter()
+    simulation.run()
+    run_seconds = time.perf_counter() - start
+
+    return {"setup_seconds": setup_seconds,
+            "run_seconds": run_seconds,
+            "steps_per_sec": scenario["steps"] / run_seconds,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "medium_queue_mean": sum(queue_sizes) / len(queue_sizes) if queue_sizes else 0.0,
+            "medium_queue_max": max(queue_sizes, default=0),
+            "control_packets_per_step": simulation.metrics.all_control_packets_in_simulation / scenario["steps"],
+            "score": float(simulation.metrics.score())}
+
+
+def run_in_process(scenario, overrides):
+    """ run the scenario in a fresh python process, return its measures or the error that stopped it """
+    command = [sys.executable, "-m", "src.experiments.benchmark", "-scenario", json.dumps(scenario)]
+    for name, value in overrides.items():
+        command += ["-cfg", name + "=" + repr(value)]
+
+    completed = subprocess.run(command, capture_output=True, text=True)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        error = completed.stderr.strip().splitlines()
+        return {"error": error[-1] if error else "exit code " + str(completed.returncode)}
+    return json.loads(lines[-1])
+
+
+def startup_seconds(overrides, repeat=5):
+    """ the median time to import and build a headless Simulator in a fresh python, the interpreter excluded """
+    code = STARTUP_CODE.format(overrides="\n".join("config." + name + " = " + repr(value)
+                                                   for name, value in overrides.items()))
+    times = sorted(float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                        check=True).stdout.strip().splitlines()[-1])
+                   for _ in range(repeat))
+    return times[len(times) // 2]
+
+
+def compare(results, baseline):
+    """ print the measures of the results against the ones of the baseline """
+    print("{:<24}{:>12}{:>10}{:>12}{:>10}{:>12}{:>12}".format(
+        "scenario", "steps/sec", "vs base", "rss MB", "vs base", "queue max", "ctrl/step"))
+    for key, measures in results.items():
+        if "error" in measures:
+            print("{:<24} {}".format(key, measures["error"]))
+            continue
+
+        base = baseline.get(key, {})
+        speedup = measures["steps_per_sec"] / base["steps_per_sec"] if "steps_per_sec" in base else float("nan")
+        memory = measures["peak_rss_mb"] / base["peak_rss_mb"] if "peak_rss_mb" in base else float("nan")
+        print("{:<24}{:>12.1f}{:>9.2f}x{:>12.1f}{:>9.2f}x{:>12}{:>12.1f}".format(
+            key, measures["steps_per_sec"], speedup, measures["peak_rss_mb"], memory,
+            measures["medium_queue_max"], measures["control_packets_per_step"]))
+
+
+def parse_overrides(assignments):
+    """ the config overrides { name : value } of the NAME=VALUE assignments """
+    overrides = {}
+    for assignment in assignments:
+        name, value = assignment.split("=", 1)
+        assert hasattr(config, name), "unknown config: " + name
+        overrides[name] = literal_eval(value)
+    return overrides
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+
+    parser.add_argument("-nd", dest='numbers_of_drones', action="store", type=int, nargs="+", default=SIZES,
+                        help="the numbers of drones of the scenarios")
+    parser.add_argument("-areas", dest='areas', action="store", type=str, nargs="+", choices=list(AREAS),
+                        default=list(AREAS), help="the areas of the scenarios")
+    parser.add_argument("-alg", dest='algorithms_routing', action="store", type=str, nargs="+",
+                        choices=config.RoutingAlgorithm.keylist(), default=config.RoutingAlgorithm.keylist(),
+                        help="the routing algorithms of the scenarios")
+    parser.add_argument("-steps", dest='steps', action="store", type=int, default=500,
+                        help="the steps of each simulation")
+    parser.add_argument("-cfg", dest='config', action="append", default=[],
+                        help="a config override NAME=VALUE, e.g. -cfg DISCRETE_EVENTS=True")
+    parser.add_argument("-baseline", dest='baseline', action="store", type=str,
+                        default=os.path.join(config.BENCHMARKS_DIR, BASELINE_NAME),
+                        help="the results to compare with")
+    parser.add_argument("-save_baseline", dest='save_baseline', action="store_true",
+                        help="save the results as the new baseline")
+    parser.add_argument("-scenario", dest='scenario', action="store", type=str, default=None,
+                        help="(internal) run a single json scenario and print its measures")
+
+    args = parser.parse_args()
+    overrides = parse_overrides(args.config)
+
+    if args.scenario is not None:  # a single scenario, in the process started by run_in_process
+        try:
+            measures = run_scenario(json.loads(args.scenario), overrides)
+        except Exception as e:
+            measures = {"error": repr(e)}
+        print(json.dumps(measures))
+        sys.exit(0)
+
+    startup = startup_seconds(overrides)
+    print("Startup of a headless Simulator: " + str(round(startup, 3)) + " sec (target "
+          + str(STARTUP_TARGET_SECONDS) + " sec)", flush=True)
+
+    results = {}
+    for scenario in scenarios(args.numbers_of_drones, args.areas, args.algorithms_routing, args.steps):
+        results[scenario_key(scenario)] = {**scenario, **run_in_process(scenario, overrides)}
+        print("Done: ", scenario_key(scenario), flush=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if "startup_seconds" in baseline:
+        print("Startup vs baseline: " + str(round(startup / baseline["startup_seconds"], 2)) + "x")
+    compare(results, baseline.get("results", {}))
+
+    out = {"date": util.date(), "config": {name: repr(value) for name, value in overrides.items()},
+           "startup_seconds": startup, "results": results}
+    filename = os.path.join(config.BENCHMARKS_DIR, "benchmark_" + out["date"] + ".json")
+    util.make_path(filename)
+    with open(filename, "w") as f:
+        json.dump(out, f, indent=2)
+    if args.save_baseline:
+        with open(os.path.join(config.BENCHMARKS_DIR, BASELINE_NAME), "w") as f:
+            json.dump(out, f, indent=2)
+    print("Benchmark saved: ", filename)
@@ -0,0 +1,182 @@
+from src.utilities import config
+from src.experiments.experiment_ndrones import sim_parameters, sim_setup, out_filename, metrics_filename
+from src.experiments.manifest import CampaignManifest, parameters_key
+from src.experiments.result_cache import ResultCache, simulation_key
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from argparse import ArgumentParser
+from collections import deque
+from contextlib import redirect_stderr
+from tqdm import tqdm
+import os
+
+"""
+This file runs an experimental campaign of experiment_ndrones: all the (n_drones, seed, algorithm) simulations are
+spread over a pool of processes, each one saves its metrics as soon as it is done. If a worker dies (e.g. it is killed
+for the memory), the simulations that were running are run again one at a time, each alone in its own process, to
+find the one that killed the worker: only that one is charged with the attempt. The others go on in a new pool.
+The completed simulations are recorded in the manifest of the campaign (see src.experiments.manifest), running the
+same campaign again resumes it: only the simulations failed or without valid results are run.
+The simulations already run with the same configuration, in this or in other campaigns, are taken from the
+result cache (see src.experiments.result_cache).
+
+e.g. python -m src.experiments.campaign -nd 5 10 20 -i_s 0 -e_s 50 -alg GEO RND -w 64
+"""
+
+MAX_ATTEMPTS = 3  # how many times a simulation that kills its worker is run alone before it is failed
+
+
+def run_job(path_filename, n_drones, seed, algorithm_routing, cache=None):
+    """ run a simulation of the campaign in a worker, save its metrics and return its score.
+        If the cache has the results of the same simulation, they are used and nothing is run
+    """
+    filename = out_filename(path_filename, n_drones, seed, algorithm_routing)
+    if cache is not None:
+        key = simulation_key(sim_parameters(n_drones, seed, algorithm_routing))
+        metrics = cache.load(key, metrics_filename(path_filename, n_drones, seed, algorithm_routing))
+        if metrics is not None:
+            return round(metrics["score"], 2)
+
+    simulation = sim_setup(n_drones, seed, algorithm_routing)
+    with open(os.devnull, "w") as devnull, redirect_stderr(devnull):
+        simulation.run()  # without the progress bar of the simulation, the one of the campaign is enough
+
+    simulation.save_metrics(filename)
+    simulation.metrics.close()
+    if cache is not None:
+        cache.put(key, metrics_filename(path_filename, n_drones, seed, algorithm_routing))
+    return round(simulation.metrics.score(), 2)
+
+
+def campaign_jobs(n_drones_list, in_seed, out_seed, algorithms):
+    """ the (n_drones, seed, algorithm) of the campaign, the biggest swarms (the longest simulations) first """
+    jobs = [(n_drones, seed, algorithm_routing) for algorithm_routing in algorithms
+            for n_drones in n_drones_list for seed in range(in_seed, out_seed)]
+    return sorted(jobs, key=lambda job: -job[0])
+
+
+def job_key(job):
+    """ the key of the job in the manifest """
+    return parameters_key(sim_parameters(*job))
+
+
+def run_isolated(path_filename, job, cache=None):
+    """ run the job alone in a new process: if the process dies, it is this job that killed it """
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run_job, path_filename, *job, cache=cache).result()
+
+
+def run_campaign(path_filename, jobs, n_workers=None, max_attempts=MAX_ATTEMPTS, manifest=None, cache=None):
+    """ run the jobs on n_workers processes (all the cpus by default), skipping those done in the manifest,
+        return the scores { job : score } and the failed jobs { job : error }.
+        At most n_workers jobs are submitted at once, so the jobs lost when a worker dies are those that were
+        running: each of them is run again alone, the attempts are counted only there, where a dead worker
+        identifies the job that killed it
+    """
+    scores, failed = {}, {}
+    attempts = {job: 0 for job in jobs}
+    n_workers = n_workers or os.cpu_count()
+
+    if manifest is not None:
+        for job in jobs:
+            if manifest.is_done(job_key(job)):
+                scores[job] = manifest.score(job_key(job))
+
+    progress = tqdm(total=len(jobs), initial=len(scores))
+
+    def completed(job, score=None, error=None):
+        if error is None:
+            scores[job] = score
+            if manifest is not None:
+                manifest.record_done(job_key(job), job, metrics_filename(path_filename, *job), score)
+        else:
+            failed[job] = error
+            if manifest is not None:
+                manifest.record_failed(job_key(job), job, error)
+        progress.update(1)
+        progress.set_postfix(failed=len(failed))
+
+    pending = deque(job for job in jobs if job not in scores)
+    while pending:
+        suspects = []  # the jobs that were running when a worker died
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            running = {}
+            while pending or running:
+                while pending and len(running) < n_workers and not suspects:
+                    job = pending.popleft()
+                    try:
+                        running[pool.submit(run_job, path_filename, *job, cache=cache)] = job
+                    except BrokenProcessPool:
+                        suspects.append(job)
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED) if running else ((), ())
+                for future in finished:
+                    job = running.pop(future)
+                    try:
+                        completed(job, future.result())
+                    except BrokenProcessPool:
+                        # a worker died, the jobs running in the pool are lost with it
+                        suspects.append(job)
+                    except Exception as e:
+                        completed(job, error=repr(e))
+
+                if suspects and not running:
+                    break
+
+        for job in sorted(suspects, key=jobs.index):
+            while True:
+                attempts[job] += 1
+                try:
+                    completed(job, run_isolated(path_filename, job, cache))
+                except BrokenProcessPool:
+                    if attempts[job] < max_attempts:
+                        continue
+                    completed(job, error="the worker died " + str(attempts[job]) + " times")
+                except Exception as e:
+                    completed(job, error=repr(e))
+                break
+
+    progress.close()
+    return scores, failed
+
+
+if __name__ == "__main__":
+    # parser input
+    parser = ArgumentParser()
+
+    routing_choices = config.RoutingAlgorithm.keylist()
+
+    parser.add_argument("-nd", dest='numbers_of_drones', action="store", type=int, nargs="+", required=True,
+                        help="the numbers of drones to use in the simulations")
+    parser.add_argument("-i_s", dest='initial_seed', action="store", type=int, required=True,
+                        help="the initial seed (included) to use in the simualtions")
+    parser.add_argument("-e_s", dest='end_seed', action="store", type=int, required=True,
+                        help="the end seed (excluded) to use in the simualtions"
+                             + "-notice that the simulations will run for seed in (i_s, e_s)")
+    parser.add_argument("-alg", dest='algorithms_routing', action="store", type=str, nargs="+",
+                        choices=routing_choices, default=routing_choices, help="the routing algorithms to use")
+    parser.add_argument("-w", dest='n_workers', action="store", type=int, default=None,
+                        help="the number of processes, all the cpus by default")
+    parser.add_argument("-no_cache", dest='no_cache', action="store_true",
+                        help="run all the simulations, without using the result cache")
+
+    args = parser.parse_args()
+
+    path_filename = config.EXPERIMENTS_DIR
+    os.makedirs(path_filename, exist_ok=True)
+
+    jobs = campaign_jobs(args.numbers_of_drones, args.initial_seed, args.end_seed, args.algorithms_routing)
+    cache = None if args.no_cache else ResultCache()
+    scores, failed = run_campaign(path_filename, jobs, args.n_workers,
+                                  manifest=CampaignManifest(path_filename), cache=cache)
+
+    for algorithm_routing in args.algorithms_routing:
+        for n_drones in args.numbers_of_drones:
+            alg_scores = {seed: score for (nd, seed, alg), score in sorted(scores.items())
+                          if nd == n_drones and alg == algorithm_routing}
+            print("Ndrones: ", n_drones, " - Algo: ", algorithm_routing, "- Scores: ", alg_scores)
+
+    for job, error in failed.items():
+        print("Failed: ", job, error)
+
+    print("Campaign completed")
@@ -1,13 +1,14 @@
 from src.utilities import config
 from src.simulation.simulator import Simulator
+from src.experiments.manifest import CampaignManifest, parameters_key
 import os
 from argparse import ArgumentParser
 
 LEN_TEST = 48000 # around 3hr of mission
 DELTA = 20
 
-def sim_setup(n_drones, seed, algorithm_routing):
-    """ return the sim setup """
+def sim_parameters(n_drones, seed, algorithm_routing):
+    """ return the parameters of the Simulator of the sim setup """
     len_simulation=LEN_TEST
     time_step_duration=0.15 #150ms each step -> 72000 * 0.15 -> 3600*3 -> 3hr
     env_width=1500
@@ -31,7 +32,7 @@ def sim_setup(n_drones, seed, algorithm_routing):
 
     model_name = "model_" + str(n_drones)
 
-    return Simulator(
+    return dict(
                 len_simulation=len_simulation,
                  time_step_duration=time_step_duration,
                  seed=seed,
@@ -64,22 +65,43 @@ def sim_setup(n_drones, seed, algorithm_routing):
 
     )
 
+def sim_setup(n_drones, seed, algorithm_routing):
+    """ return the sim setup """
+    return Simulator(**sim_parameters(n_drones, seed, algorithm_routing))
+
+def out_filename(path_filename, n_drones, seed, algorithm_routing):
+    """ the file of the metrics of a simulation of the experiment, without the extension """
+    return path_filename + "out__ndrones_" + str(n_drones) + "_seed" + str(seed) + "_alg_" + algorithm_routing
+
+def metrics_filename(path_filename, n_drones, seed, algorithm_routing):
+    """ the file of the metrics of a simulation of the experiment, as saved by Simulator.save_metrics """
+    return out_filename(path_filename, n_drones, seed, algorithm_routing) + "." + config.METRICS_FORMAT
+
 def exp_ndrones(path_filename, n_drones, in_seed, out_seed, algorithm_routing):
     # ---- Experiment 1 ---- #
     # test the routing for 
     # at varying k and seed values
     scores = {}
+    manifest = CampaignManifest(path_filename)
     for seed in range(in_seed, out_seed):
 
+        # already done in a previous run of the experiment
+        key = parameters_key(sim_parameters(n_drones, seed, algorithm_routing))
+        if manifest.is_done(key):
+            print("Skipping " + algorithm_routing + " with", n_drones, "drones with seed:", seed, "- already done")
+            scores[seed] = manifest.score(key)
+            continue
+
         print("Running " + algorithm_routing + " with", n_drones, "drones with seed:", seed)
 
         simulation = sim_setup(n_drones, seed, algorithm_routing)
         simulation.run()
 
-        simulation.save_metrics(path_filename + "out__ndrones_" + str(n_drones) +
-                            "_seed" + str(seed) + "_alg_" + algorithm_routing)
+        simulation.save_metrics(out_filename(path_filename, n_drones, seed, algorithm_routing))
         print("Score: ",simulation.score(), algorithm_routing)
         scores[seed] = simulation.score()
+        manifest.record_done(key, (n_drones, seed, algorithm_routing),
+                             metrics_filename(path_filename, n_drones, seed, algorithm_routing), scores[seed])
         simulation.close()
 
     print("Ndrones: ", n_drones, " - Algo: ", algorithm_routing, "- Scores: ", scores)
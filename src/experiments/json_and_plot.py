@@ -3,12 +3,12 @@
     and plot the results 
 """
 import matplotlib.pyplot as plt 
-import json 
 import numpy as np
 import matplotlib.patches as mpatches
 import collections
 import matplotlib
 from src.utilities import config
+from src.experiments.results_store import store_of
 
 
 from argparse import ArgumentParser
@@ -58,30 +58,26 @@ def coverage_distribution(filename_format : str, ndrones : int,
     Y = []
     for seed in seeds:
         file_name = filename_format.format(ndrones, seed, alg_k)
-        with open(file_name, 'r') as fp:
-            ktri_0 = json.load(fp)
-            delivered_packets = ktri_0["drones_packets"]
-            for pack in delivered_packets:
-                X.append(pack["coord"][0])
-                Y.append(pack["coord"][1])
+        X_seed, Y_seed = store_of(file_name).coverage(file_name)
+        X.extend(X_seed)
+        Y.extend(Y_seed)
     return X, Y 
 
-#TODO: this is done for each METRIC!!! can be done once at the beginning for all the metrics
+# the result files are parsed once, in the results store, and then read from it for each metric
 def mean_std_of_metric(filename_format : str, ndrones : int, 
                         alg_k : int, seeds : list, metric : str):
     data = []
     for seed in seeds:
         file_name = filename_format.format(ndrones, seed, alg_k)
-        with open(file_name, 'r') as fp:
-            ktri_0 = json.load(fp)
-            if metric == "ratio_delivery_generated":
-                data.append(ktri_0["number_of_events_to_depot"] 
-                                        / ktri_0["number_of_generated_events"])
-            elif metric == "ratio_delivery_detected":
-                data.append(ktri_0["number_of_events_to_depot"] 
-                                / ktri_0["number_of_detected_events"])
-            else:
-                data.append(ktri_0[metric])
+        ktri_0 = store_of(file_name).metrics(file_name)
+        if metric == "ratio_delivery_generated":
+            data.append(ktri_0["number_of_events_to_depot"] 
+                                    / ktri_0["number_of_generated_events"])
+        elif metric == "ratio_delivery_detected":
+            data.append(ktri_0["number_of_events_to_depot"] 
+                            / ktri_0["number_of_detected_events"])
+        else:
+            data.append(ktri_0[metric])
 
     return np.mean(data), np.std(data)
 
@@ -0,0 +1,81 @@
+from src.simulation.simulator import Simulator
+from enum import Enum
+import hashlib
+import inspect
+import json
+import os
+
+"""
+This file contains the manifest of an experimental campaign: an append-only JSONL file with one record per completed
+(or failed) simulation, keyed by the hash of all the parameters of its Simulator. A campaign that is interrupted can be
+run again with the same arguments, the simulations whose results are recorded and still valid on disk are skipped.
+"""
+
+MANIFEST_NAME = "manifest.jsonl"
+UI_PARAMETERS = ["show_plot"]  # the parameters of the Simulator that don't change the results
+
+
+def simulator_parameters(parameters):
+    """ all the parameters of the Simulator, the given ones and the default ones """
+    defaults = {name: param.default for name, param in inspect.signature(Simulator.__init__).parameters.items()
+                if param.default is not inspect.Parameter.empty}
+    all_parameters = {**defaults, **parameters}
+    return {name: value for name, value in all_parameters.items() if name not in UI_PARAMETERS}
+
+
+def parameters_key(parameters):
+    """ the sha256 of the canonical json of all the parameters of the Simulator """
+    canonical = json.dumps(simulator_parameters(parameters), sort_keys=True, separators=(",", ":"),
+                           default=lambda value: value.name if isinstance(value, Enum) else repr(value))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def file_hash(filename):
+    """ the sha256 of the content of the file """
+    sha = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class CampaignManifest:
+
+    def __init__(self, path_filename):
+        """ path_filename: the directory of the results of the campaign """
+        self.filename = os.path.join(path_filename, MANIFEST_NAME)
+        self.records = {}  # { key : last record of the key }
+
+        if os.path.exists(self.filename):
+            with open(self.filename) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:  # a line truncated by a crash
+                        continue
+                    self.records[record["key"]] = record
+
+    def __append(self, record):
+        self.records[record["key"]] = record
+        with open(self.filename, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_done(self, key, job, result_filename, score):
+        """ the simulation of the job completed and its results are in result_filename """
+        self.__append({"key": key, "job": list(job), "status": "done", "file": result_filename,
+                       "sha256": file_hash(result_filename), "score": score})
+
+    def record_failed(self, key, job, error):
+        self.__append({"key": key, "job": list(job), "status": "failed", "error": error})
+
+    def is_done(self, key):
+        """ True if the simulation completed and its results are still on disk, unchanged """
+        record = self.records.get(key)
+        if record is None or record["status"] != "done":
+            return False
+        return os.path.exists(record["file"]) and file_hash(record["file"]) == record["sha256"]
+
+    def score(self, key):
+        return self.records[key]["score"]
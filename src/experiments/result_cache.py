@@ -0,0 +1,104 @@
+from src.utilities import config
+from src.experiments.manifest import simulator_parameters
+from src.simulation.simulation_config import SimulationConfig
+from src.simulation.metrics import Metrics
+from enum import Enum
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+"""
+This file contains the cache of the results of the simulations. The metrics (json or npz) of a simulation are stored under
+the hash of its configuration: all the parameters of the Simulator, the fields of its SimulationConfig that may
+change the results and the source code of the routing algorithm. A simulation with the same configuration is not
+run again, its metrics are copied from the cache. The cache has a max size, the least recently used results
+are evicted first.
+"""
+
+
+def routing_source(routing_algorithm):
+    """ the source code of the routing algorithm class and of its base classes in the simulator """
+    return [inspect.getsource(routing_class) for routing_class in routing_algorithm.value.__mro__
+            if routing_class.__module__.startswith("src.")]
+
+
+def simulation_key(parameters):
+    """ the sha256 of the configuration of the simulation with the given parameters of the Simulator,
+        its simulation_config is the one of the current globals of src.utilities.config if not given
+    """
+    parameters = simulator_parameters(parameters)
+    simulation_config = parameters.pop("simulation_config", None)
+    if simulation_config is None:
+        simulation_config = SimulationConfig.from_module()
+
+    configuration = {"parameters": parameters,
+                     "config": simulation_config.results_fields(),
+                     "routing": routing_source(parameters["routing_algorithm"])}
+    canonical = json.dumps(configuration, sort_keys=True, separators=(",", ":"),
+                           default=lambda value: value.name if isinstance(value, Enum) else repr(value))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, cache_dir=config.RESULT_CACHE_DIR, max_size=config.RESULT_CACHE_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+        self.evict()
+
+    def __filename(self, key, extension):
+        return os.path.join(self.cache_dir, key + extension)
+
+    def get(self, key, extension=".json"):
+        """ the file of the cached metrics of the key, None if not cached. The file is marked as used now """
+        filename = self.__filename(key, extension)
+        try:
+            os.utime(filename)  # the mtime is the last use
+        except FileNotFoundError:
+            return None
+        return filename
+
+    def load(self, key, out_filename):
+        """ copy the cached metrics of the key in out_filename (same format),
+            return their scalar metrics (see Metrics.summary_from_file) or None if not cached
+        """
+        filename = self.get(key, os.path.splitext(out_filename)[1])
+        if filename is None:
+            return None
+        try:
+            shutil.copyfile(filename, out_filename)
+        except FileNotFoundError:  # evicted in the meanwhile
+            return None
+        return Metrics.summary_from_file(out_filename)
+
+    def put(self, key, filename):
+        """ store the metrics in filename under the key, then evict the least recently used results """
+        cache_filename = self.__filename(key, os.path.splitext(filename)[1])
+        tmp_filename = cache_filename + "." + str(os.getpid()) + ".tmp"
+        shutil.copyfile(filename, tmp_filename)
+        os.replace(tmp_filename, cache_filename)
+        self.evict()
+
+    def evict(self):
+        """ remove the least recently used results until the cache fits its max size """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".tmp"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # removed by another process
+                pass
+            size -= entry_size
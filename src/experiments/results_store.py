@@ -0,0 +1,99 @@
+from src.utilities import columnar
+import functools
+import json
+import os
+import sqlite3
+
+"""
+This file contains the indexed store of the results of the simulations, used to aggregate and plot them.
+Each result file (the json or the npz of the metrics) is parsed once, its scalar metrics and the coordinates of its packets
+are saved in a SQLite database next to the results, the file is parsed again only if it changes (mtime or size).
+"""
+
+STORE_NAME = "results_store.sqlite"
+
+
+@functools.lru_cache(maxsize=None)
+def results_store(directory):
+    """ the store of the results in the directory, one per directory """
+    return ResultsStore(os.path.join(directory, STORE_NAME))
+
+
+def store_of(filename):
+    """ the store of the directory of the result file """
+    return results_store(os.path.dirname(os.path.abspath(filename)))
+
+
+class ResultsStore:
+
+    def __init__(self, db_filename):
+        self.connection = sqlite3.connect(db_filename)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                    "(file TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, metrics TEXT)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS coverage (file TEXT, x REAL, y REAL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS coverage_file ON coverage (file)")
+
+        self.metrics_cache = {}  # { file : (mtime, size, scalar metrics) }
+
+    @staticmethod
+    def __resolve(filename):
+        """ the result file, either in json or in npz, e.g. x.json may be saved as x.npz """
+        if not os.path.exists(filename):
+            root, extension = os.path.splitext(filename)
+            other_filename = root + (".npz" if extension == ".json" else ".json")
+            if os.path.exists(other_filename):
+                return os.path.abspath(other_filename)
+        return os.path.abspath(filename)
+
+    @staticmethod
+    def __parse(filename):
+        """ the results of the file: the scalar metrics and the coordinates of the packets """
+        if filename.endswith(".npz"):
+            results, columns = columnar.load_columns(filename)
+            coordinates = columns["drones_packets_coord"].tolist()
+        else:
+            with open(filename, 'r') as fp:
+                results = json.load(fp)
+            coordinates = [pck["coord"] for pck in results["drones_packets"]]
+
+        metrics = {name: value for name, value in results.items()
+                   if isinstance(value, (int, float)) and not isinstance(value, bool)}
+        return metrics, coordinates
+
+    def __ingest(self, filename):
+        """ the scalar metrics of the result file, parsed again only if the file changed """
+        filename = self.__resolve(filename)
+        stat = os.stat(filename)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self.metrics_cache.get(filename)
+        if cached is not None and cached[:2] == version:
+            return cached[2]
+
+        row = self.connection.execute("SELECT mtime, size, metrics FROM results WHERE file = ?", (filename,)).fetchone()
+        if row is not None and tuple(row[:2]) == version:
+            metrics = json.loads(row[2])
+        else:
+            metrics, coordinates = self.__parse(filename)
+            coverage = [(filename, x, y) for x, y in coordinates]
+
+            with self.connection:
+                self.connection.execute("DELETE FROM coverage WHERE file = ?", (filename,))
+                self.connection.executemany("INSERT INTO coverage VALUES (?, ?, ?)", coverage)
+                self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                        (filename, version[0], version[1], json.dumps(metrics)))
+
+        self.metrics_cache[filename] = version + (metrics,)
+        return metrics
+
+    def metrics(self, filename):
+        """ the scalar metrics (e.g. score, number_of_events_to_depot) of the result file """
+        return self.__ingest(filename)
+
+    def coverage(self, filename):
+        """ the coordinates of the packets of the result file, a tuple (X, Y) """
+        self.__ingest(filename)
+        rows = self.connection.execute("SELECT x, y FROM coverage WHERE file = ? ORDER BY rowid",
+                                       (self.__resolve(filename),)).fetchall()
+        return [x for x, _ in rows], [y for _, y in rows]
@@ -1,10 +1,10 @@
 
 
-from src.entities.uav_entities import DataPacket, ACKPacket, HelloPacket, Packet
-from src.utilities import utilities as util
+# the modules and not their classes: uav_entities imports src.utilities.config, that imports the routing algorithms
+from src.entities import uav_entities
+from src.routing_algorithms import channel_model
 from src.utilities import config
 
-from scipy.stats import norm
 import abc
 
 class BASE_routing(metaclass=abc.ABCMeta):
@@ -15,8 +15,11 @@ class BASE_routing(metaclass=abc.ABCMeta):
         self.drone = drone
         self.simulator = simulator
 
+        # the success tables are shared by all the drones with the same communication range
+        self.channel_model = channel_model.ChannelModel(simulator, self.drone.communication_range)
         if self.simulator.communication_error_type == config.ChannelError.GAUSSIAN:
-            self.buckets_probability = self.__init_guassian()
+            self.radius_corona = self.channel_model.radius_corona
+            self.buckets_probability = self.channel_model.buckets_probability
 
         self.current_n_transmission = 0
         self.hello_messages = {}  #{ drone_id : most recent hello packet}
@@ -31,20 +34,20 @@ class BASE_routing(metaclass=abc.ABCMeta):
     def routing_close(self, drones, cur_step):
         self.no_transmission = False
 
-    def drone_reception(self, src_drone, packet: Packet, current_ts):
+    def drone_reception(self, src_drone, packet: 'uav_entities.Packet', current_ts):
         """ handle reception an ACKs for a packets """
-        if isinstance(packet, HelloPacket):
+        if isinstance(packet, uav_entities.HelloPacket):
             src_id = packet.src_drone.identifier
             self.hello_messages[src_id] = packet  # add packet to our dictionary
 
-        elif isinstance(packet, DataPacket):
+        elif isinstance(packet, uav_entities.DataPacket):
             self.no_transmission = True
             self.drone.accept_packets([packet])
             # build ack for the reception
-            ack_packet = ACKPacket(self.drone, src_drone, self.simulator, packet, current_ts)
+            ack_packet = uav_entities.ACKPacket(self.drone, src_drone, self.simulator, packet, current_ts)
             self.unicast_message(ack_packet, self.drone, src_drone, current_ts)
 
-        elif isinstance(packet, ACKPacket):
+        elif isinstance(packet, uav_entities.ACKPacket):
             self.drone.remove_packets([packet.acked_packet])
             # packet.acked_packet.optional_data
             # print(self.is_packet_received_drone_reward, "ACK", self.drone.identifier)
@@ -55,11 +58,11 @@ class BASE_routing(metaclass=abc.ABCMeta):
     def drone_identification(self, drones, cur_step):
         """ handle drone hello messages to identify neighbors """
         # if self.drone in drones: drones.remove(self.drone)  # do not send hello to yourself
-        if cur_step % config.HELLO_DELAY != 0:  # still not time to communicate
+        if cur_step % self.simulator.config.hello_delay != 0:  # still not time to communicate
             return
 
-        my_hello = HelloPacket(self.drone, cur_step, self.simulator, self.drone.coords,
-                               self.drone.speed, self.drone.next_target())
+        my_hello = uav_entities.HelloPacket(self.drone, cur_step, self.simulator, self.drone.coords,
+                                            self.drone.speed, self.drone.next_target())
 
         self.broadcast_message(my_hello, self.drone, drones, cur_step)
 
@@ -95,10 +98,10 @@ class BASE_routing(metaclass=abc.ABCMeta):
 
             opt_neighbors = []
             for hpk_id in self.hello_messages:
-                hpk: HelloPacket = self.hello_messages[hpk_id]
+                hpk: uav_entities.HelloPacket = self.hello_messages[hpk_id]
 
                 # check if packet is too old
-                if hpk.time_step_creation < cur_step - config.OLD_HELLO_PACKET:
+                if hpk.time_step_creation < cur_step - self.simulator.config.old_hello_packet:
                     continue
 
                 opt_neighbors.append((hpk, hpk.src_drone))
@@ -122,7 +125,7 @@ class BASE_routing(metaclass=abc.ABCMeta):
 
         for other_drone in drones:
             if self.drone.identifier != other_drone.identifier:                                   # not the same drone
-                drones_distance = util.euclidean_distance(self.drone.coords, other_drone.coords)  # distance between two drones
+                drones_distance = self.simulator.geometry.distance(self.drone.identifier, other_drone.identifier)  # distance between two drones
 
                 if drones_distance <= min(self.drone.communication_range, other_drone.communication_range):  # one feels the other & vv
 
@@ -152,18 +155,22 @@ class BASE_routing(metaclass=abc.ABCMeta):
 
     def broadcast_message(self, packet, src_drone, dst_drones, curr_step):
         """ send a message to my neigh drones"""
+        if dst_drones is self.simulator.drones:
+            # a single transmission, the medium finds the drones in range at the delivery
+            self.network_disp.broadcast_packet_to_medium(packet, src_drone, dst_drones, curr_step + self.simulator.config.lil_delta)
+            return
+
         for d_drone in dst_drones:
             self.unicast_message(packet, src_drone, d_drone, curr_step)
 
     def unicast_message(self, packet, src_drone, dst_drone, curr_step):
         """ send a message to my neigh drones"""
         # Broadcast using Network dispatcher
-        self.simulator.network_dispatcher.send_packet_to_medium(packet, src_drone, dst_drone, curr_step + config.LIL_DELTA)
+        self.simulator.network_dispatcher.send_packet_to_medium(packet, src_drone, dst_drone, curr_step + self.simulator.config.lil_delta)
 
     def gaussian_success_handler(self, drones_distance):
         """ get the probability of the drone bucket """
-        bucket_id = int(drones_distance / self.radius_corona) * self.radius_corona
-        return self.buckets_probability[bucket_id] * config.GUASSIAN_SCALE
+        return self.channel_model.success_probability(drones_distance)
 
     def transfer_to_depot(self, depot, cur_step):
         """ self.drone is close enough to depot and offloads its buffer to it, restarting the monitoring
@@ -172,26 +179,3 @@ class BASE_routing(metaclass=abc.ABCMeta):
         depot.transfer_notified_packets(self.drone, cur_step)
         self.drone.empty_buffer()
         self.drone.move_routing = False
-
-    # --- PRIVATE ---
-    def __init_guassian(self, mu=0, sigma_wrt_range=1.15, bucket_width_wrt_range=.5):
-
-        # bucket width is 0.5 times the communication radius by default
-        self.radius_corona = int(self.drone.communication_range * bucket_width_wrt_range)
-
-        # sigma is 1.15 times the communication radius by default
-        sigma = self.drone.communication_range * sigma_wrt_range
-
-        max_prob = norm.cdf(mu + self.radius_corona, loc=mu, scale=sigma) - norm.cdf(0, loc=mu, scale=sigma)
-
-        # maps a bucket starter to its probability of gaussian success
-        buckets_probability = {}
-        for bk in range(0, self.drone.communication_range, self.radius_corona):
-            prob_leq = norm.cdf(bk, loc=mu, scale=sigma)
-            prob_leq_plus = norm.cdf(bk + self.radius_corona, loc=mu, scale=sigma)
-            prob = (prob_leq_plus - prob_leq) / max_prob
-            buckets_probability[bk] = prob
-
-        return buckets_probability
-
-
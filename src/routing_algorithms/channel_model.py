@@ -0,0 +1,75 @@
+import functools
+import math
+
+import numpy as np
+
+from src.utilities import config
+
+"""
+This file contains the channel model of the drones communications. The success probabilities of the gaussian channel
+are computed once per (communication range, sigma, bucket width) and shared by all the drones and all the simulations
+of the process. The model answers both a single transmission and a batch of transmissions (e.g. all the receivers of
+a broadcast) at once.
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def gaussian_buckets(communication_range, mu=0, sigma_wrt_range=1.15, bucket_width_wrt_range=.5):
+    """ returns the width of the buckets (radius corona) and the tuple of the probabilities of success of the buckets
+        [0, radius corona), [radius corona, 2 * radius corona)... up to the communication range
+    """
+    def normal_cdf(x):  # as scipy.stats.norm.cdf(x, loc=mu, scale=sigma), without importing scipy
+        return 0.5 * math.erfc(-(x - mu) / sigma / math.sqrt(2))
+
+    # bucket width is 0.5 times the communication radius by default
+    radius_corona = int(communication_range * bucket_width_wrt_range)
+
+    # sigma is 1.15 times the communication radius by default
+    sigma = communication_range * sigma_wrt_range
+
+    max_prob = normal_cdf(mu + radius_corona) - normal_cdf(0)
+
+    buckets_probability = []
+    for bk in range(0, communication_range, radius_corona):
+        prob_leq = normal_cdf(bk)
+        prob_leq_plus = normal_cdf(bk + radius_corona)
+        buckets_probability.append((prob_leq_plus - prob_leq) / max_prob)
+
+    return radius_corona, tuple(buckets_probability)
+
+
+class ChannelModel:
+    """ The channel of a drone with the given communication range, it draws from the routing random generator """
+
+    def __init__(self, simulator, communication_range):
+        self.simulator = simulator
+        self.error_type = simulator.communication_error_type
+        self.communication_range = communication_range
+
+        if self.error_type == config.ChannelError.GAUSSIAN:
+            self.radius_corona, probabilities = gaussian_buckets(communication_range)
+
+            # maps a bucket starter to its probability of gaussian success
+            self.buckets_probability = {bk * self.radius_corona: prob for bk, prob in enumerate(probabilities)}
+            self.success_table = np.array(probabilities) * simulator.config.guassian_scale
+
+    def success_probability(self, drones_distance):
+        """ get the probability of the drone bucket """
+        bucket_id = int(drones_distance / self.radius_corona) * self.radius_corona
+        return self.buckets_probability[bucket_id] * self.simulator.config.guassian_scale
+
+    def success(self, distances):
+        """ whether each transmission at the given distances goes through (bool array). It draws one random number
+            per transmission, in order, exactly as len(distances) single transmissions
+        """
+        distances = np.asarray(distances, dtype=float)
+
+        if self.error_type == config.ChannelError.NO_ERROR:
+            return np.ones(len(distances), dtype=bool)
+
+        draws = self.simulator.rnd_routing.rand(len(distances))
+        if self.error_type == config.ChannelError.UNIFORM:
+            return draws <= self.simulator.drone_communication_success
+
+        elif self.error_type == config.ChannelError.GAUSSIAN:
+            return draws <= self.success_table[(distances / self.radius_corona).astype(int)]
@@ -16,7 +16,7 @@ class AndreaGeoRouting(BASE_routing):
 
         depot_pos = self.drone.depot.coords
         cur_step = self.simulator.cur_step
-        my_distance_from_bs = util.euclidean_distance(self.drone.coords, depot_pos)
+        my_distance_from_bs = self.simulator.geometry.depot_distance(self.drone.identifier)
         drone_to_send = None
         current_score = my_distance_from_bs
         for hll_pck, close_drone in opt_neighbors:
@@ -1,39 +1,123 @@
-
-import src.utilities.utilities as util
-from src.entities.uav_entities import DataPacket
+from src.entities.uav_entities import DataPacket, HelloPacket
+from src.routing_algorithms.BASE_routing import BASE_routing
 from src.simulation.metrics import Metrics
+from collections import defaultdict
+
+import heapq
 
 
 class MediumDispatcher:
 
-    def __init__(self, metric_class: Metrics):
-        self.packets = []
+    def __init__(self, metric_class: Metrics, simulator=None):
+        # calendar queue of the packets on the medium { to_send_ts : [(packet, src_drone, dst_drone), ...] }
+        # dst_drone is None for a broadcast to all the drones
+        self.packets = defaultdict(list)
+        self.send_ts = []  # heap of the time steps in the calendar
         self.metric_class = metric_class
+        self.simulator = simulator
 
-    def send_packet_to_medium(self, packet, src_drone, dst_drone, to_send_ts):
+        # the drones that received a packet (other than hello) in the last run of the medium
+        self.receivers = []
+
+        # { routing class : whether its drones use the default channel }
+        self.default_channel = {}
+
+    def count_packet(self, packet, n_packets=1):
+        """ count the packets sent on the medium """
         if isinstance(packet, DataPacket):
-            self.metric_class.all_data_packets_in_simulation += 1
+            self.metric_class.all_data_packets_in_simulation += n_packets
         else:
-            self.metric_class.all_control_packets_in_simulation += 1
+            self.metric_class.all_control_packets_in_simulation += n_packets
+
+    def send_packet_to_medium(self, packet, src_drone, dst_drone, to_send_ts):
+        self.count_packet(packet)
+
+        if to_send_ts not in self.packets:
+            heapq.heappush(self.send_ts, to_send_ts)
+        self.packets[to_send_ts].append((packet, src_drone, dst_drone))
 
-        self.packets.append((packet, src_drone, dst_drone, to_send_ts))
+    def broadcast_packet_to_medium(self, packet, src_drone, dst_drones, to_send_ts):
+        """ a single transmission to all the drones (dst_drones), the receivers are resolved at the delivery.
+            It is counted as one packet per destination drone, as many unicast messages. """
+        self.count_packet(packet, len(dst_drones))
+
+        if to_send_ts not in self.packets:
+            heapq.heappush(self.send_ts, to_send_ts)
+        self.packets[to_send_ts].append((packet, src_drone, None))
+
+    def next_send_ts(self, current_ts):
+        """ the first time step after current_ts in which a packet has to be sent, None if there are no packets """
+        while self.send_ts and self.send_ts[0] <= current_ts:
+            heapq.heappop(self.send_ts)
+        return self.send_ts[0] if self.send_ts else None
 
     def run_medium(self, current_ts):
-        to_drop_indices = []
-        original_self_packets = self.packets[:]
-        self.packets = []
+        """ deliver the packets to send at current_ts, only the slot of the calendar of current_ts is touched """
+        self.receivers = []
+        while self.send_ts and self.send_ts[0] <= current_ts:
+            heapq.heappop(self.send_ts)
+
+        if current_ts not in self.packets:  # nothing to send
+            return
+
+        for packet, src_drone, dst_drone in self.packets.pop(current_ts):
+            if dst_drone is not None:
+                self.__deliver(packet, src_drone, dst_drone, current_ts)
+            else:
+                self.__deliver_broadcast(packet, src_drone, current_ts)
 
-        for i in range(len(original_self_packets)):
-            packet, src_drone, dst_drone, to_send_ts = original_self_packets[i]
+    def __deliver(self, packet, src_drone, dst_drone, current_ts):
+        """ the packet reaches dst_drone if it is in range and the channel is successful """
+        if src_drone.identifier != dst_drone.identifier:
+            drones_distance = self.simulator.geometry.distance(src_drone.identifier, dst_drone.identifier)
+            if drones_distance <= min(src_drone.communication_range, dst_drone.communication_range):
+                if dst_drone.routing_algorithm.channel_success(drones_distance):
+                    self.__receive(packet, src_drone, dst_drone, current_ts)
 
-            if to_send_ts == current_ts:  # time to send this packet
-                to_drop_indices.append(i)
+    def __deliver_broadcast(self, packet, src_drone, current_ts):
+        """ the packet reaches the drones in range of src_drone whose channel is successful, in the order of the drones.
+            The channel of all the receivers is drawn at once, if it is the one of the simulator for all of them
+        """
+        geometry = self.simulator.geometry
+        if self.simulator.drones_state is not None and not geometry.moved:
+            # the drones state keeps the coordinates in arrays: the drones around the source are read at once
+            # from its distances, the very same values of geometry.distance
+            drones = self.simulator.drones
+            candidates = [(drones[dst_id], drones_distance) for dst_id, drones_distance
+                          in geometry.within(src_drone.identifier, src_drone.communication_range)]
+        else:
+            # only the drones around the source can receive it
+            candidates = [(dst_drone, geometry.distance(src_drone.identifier, dst_drone.identifier))
+                          for dst_drone in self.simulator.spatial_index.candidates(src_drone.coords,
+                                                                                    src_drone.communication_range)
+                          if src_drone.identifier != dst_drone.identifier]
+
+        receivers = []  # (drone, distance) of the drones in range
+        for dst_drone, drones_distance in candidates:
+            if drones_distance <= min(src_drone.communication_range, dst_drone.communication_range):
+                receivers.append((dst_drone, drones_distance))
+
+        if all(self.__has_default_channel(dst_drone) for dst_drone, _ in receivers):
+            successes = self.simulator.channel_model.success([drones_distance for _, drones_distance in receivers])
+            for (dst_drone, _), success in zip(receivers, successes):
+                if success:
+                    self.__receive(packet, src_drone, dst_drone, current_ts)
+        else:
+            for dst_drone, drones_distance in receivers:
+                if dst_drone.routing_algorithm.channel_success(drones_distance):
+                    self.__receive(packet, src_drone, dst_drone, current_ts)
 
-                if src_drone.identifier != dst_drone.identifier:
-                    drones_distance = util.euclidean_distance(src_drone.coords, dst_drone.coords)
-                    if drones_distance <= min(src_drone.communication_range, dst_drone.communication_range):
-                        if dst_drone.routing_algorithm.channel_success(drones_distance):
-                            dst_drone.routing_algorithm.drone_reception(src_drone, packet, current_ts)  # reception of a packet
+    def __has_default_channel(self, drone):
+        """ whether the drone receives through the channel of the simulator and without drawing random numbers,
+            so that its channel can be drawn together with the others """
+        routing_class = type(drone.routing_algorithm)
+        if routing_class not in self.default_channel:
+            self.default_channel[routing_class] = all(getattr(routing_class, method) is getattr(BASE_routing, method)
+                                                      for method in ("channel_success", "gaussian_success_handler",
+                                                                     "drone_reception"))
+        return self.default_channel[routing_class] and drone.communication_range == self.simulator.drone_com_range
 
-        original_self_packets = [original_self_packets[i] for i in range(len(original_self_packets)) if i not in to_drop_indices]
-        self.packets = original_self_packets + self.packets
+    def __receive(self, packet, src_drone, dst_drone, current_ts):
+        dst_drone.routing_algorithm.drone_reception(src_drone, packet, current_ts)  # reception of a packet
+        if not isinstance(packet, HelloPacket):
+            self.receivers.append(dst_drone)
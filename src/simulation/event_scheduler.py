@@ -0,0 +1,253 @@
+import heapq
+import math
+import numpy as np
+
+"""
+This file contains the discrete-event engine of the simulator. Instead of running every step, the engine keeps a
+priority queue of timestamped actions and the clock jumps straight to the next one:
+    DELIVERY : packets to deliver on the medium
+    EVENT    : event generation on the drones
+    HELLO    : hello emission, every drone does the routing
+    WAKE     : a drone has something to do: retransmission, packet expiry or entry in the range of the depot
+    ARRIVAL  : a drone with packets reaches the end of the segment it flies (the point where it left the mission,
+               the depot, a waypoint of a mission far from the depot), its next entry in the range of the depot is
+               computed again
+    OBSERVE  : the end of a step is observed (state hash, live score, plot), see Simulator.close_step
+
+The drones with packets are the only ones whose position matters between two actions: they transfer their packets
+as soon as they are in the range of the depot. Each of them flies straight to the target of its segment, so the
+step of its entry in the range of the depot (the first one of the steps on the segment that falls in the disk) and
+the step of its arrival are computed in closed form when its routing changes and when it reaches a target. The
+drones on their mission are planned along the following segments of the mission too, with the precomputed
+trajectory of the mission (see src.utilities.trajectory), and they are not woken up at every waypoint.
+The ranges among the drones need no action: they are read only at the deliveries, which are actions.
+
+In between the actions the drones only fly: DronesState.fly advances them to the step of the next action, with the
+very floating point operations of the stepped engine. The closed form is used to schedule the actions only, with a
+margin, so that they are never late: the position it gives differs from the stepped one in the last bits and the
+results depend on them (the range checks, the buckets of the channel, the step of the arrival on a waypoint).
+The metrics are exactly those of the stepped engine for the same seed. Enable it with
+src.utilities.config.DISCRETE_EVENTS.
+"""
+
+RANGE_MARGIN = 1e-3  # meters, the margin of the closed form range entries, far above the rounding of the positions
+
+
+class EventScheduler:
+
+    # kind of actions, the order is that of a step of Simulator.run
+    DELIVERY = 0
+    EVENT = 1
+    HELLO = 2
+    WAKE = 3
+    ARRIVAL = 4
+    OBSERVE = 5
+
+    # routing methods that must not be overridden to schedule the routing, relay_selection is free
+    ROUTING_METHODS = ["routing", "drone_identification", "send_packets", "routing_close",
+                       "drone_reception", "transfer_to_depot"]
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.drones_state = simulator.drones_state
+        self.actions = []  # heap of (step, kind, drone id)
+        self.next_delivery = None
+        self.clock = 0  # the drones are at the beginning of this step (they did all the moves of the steps before)
+        self.wake_steps = [set() for _ in range(simulator.n_drones)]  # the steps in which every drone is woken up
+        self.arrival_steps = [None] * simulator.n_drones  # the step of the current arrival of every drone, if any
+        self.plans = [None] * simulator.n_drones  # (target, planned step) of the last plan of every drone
+        self.entries = [None] * simulator.n_drones  # (trajectory, its range entries) of the mission of every drone
+
+        self.depot_coords = tuple(simulator.depot.coords)
+        self.depot_range = [min(drone.communication_range, simulator.depot.communication_range)
+                            for drone in simulator.drones]
+
+        self.observe_delays = simulator.observe_delays()  # the steps whose end is observed
+
+        self.schedule(0, self.EVENT)
+        self.schedule(0, self.HELLO)
+        self.schedule_observe(0)
+
+    @staticmethod
+    def is_schedulable(routing_class):
+        """ True if the routing algorithm does its routing only on the scheduled actions, i.e., it uses the
+            BASE_routing routing procedure and customizes just the relay selection """
+        from src.routing_algorithms.BASE_routing import BASE_routing  # the routing imports the config, that imports this
+
+        return all(getattr(routing_class, method) is getattr(BASE_routing, method)
+                   for method in EventScheduler.ROUTING_METHODS)
+
+    def schedule(self, step, kind, drone_id=-1):
+        """ add an action to the queue """
+        if step < self.simulator.len_simulation:
+            heapq.heappush(self.actions, (step, kind, drone_id))
+
+    def schedule_observe(self, step):
+        """ observe the next step, from the given one, whose end is observed """
+        if self.observe_delays:
+            self.schedule(min(-(-step // delay) * delay for delay in self.observe_delays), self.OBSERVE)
+
+    def wake(self, step, drone_id):
+        """ wake up the drone at the given step, once """
+        if step not in self.wake_steps[drone_id]:
+            self.wake_steps[drone_id].add(step)
+            self.schedule(step, self.WAKE, drone_id)
+
+    def run(self):
+        """ run the simulation, jumping from one action to the next one: a generator of the clock, after each step
+            with actions and at the end of the simulation """
+        while self.actions:
+            self.__run_actions(self.actions[0][0])
+            yield self.clock
+
+        self.__fly_to(self.simulator.len_simulation)
+        yield self.clock
+
+    def __fly_to(self, step):
+        """ all the drones fly (no routing) up to the beginning of the step """
+        self.drones_state.fly(step - self.clock, self.simulator.time_step_duration)
+        self.clock = step
+
+    def __run_actions(self, cur_step):
+        """ do all the actions of the current step, as in Simulator.run """
+        sim = self.simulator
+        self.__fly_to(cur_step)
+        sim.cur_step = cur_step
+
+        kinds = set()
+        active_drones = set()  # the drones that do the routing
+        arrived_drones = set()
+        while self.actions and self.actions[0][0] == cur_step:
+            _, kind, drone_id = heapq.heappop(self.actions)
+            kinds.add(kind)
+            if kind == self.WAKE:
+                self.wake_steps[drone_id].discard(cur_step)
+                active_drones.add(drone_id)
+            elif kind == self.ARRIVAL and self.arrival_steps[drone_id] == cur_step:
+                self.arrival_steps[drone_id] = None
+                arrived_drones.add(drone_id)
+
+        if kinds & {self.DELIVERY, self.EVENT, self.HELLO, self.WAKE}:
+            sim.spatial_index.build(sim.drones)
+            sim.geometry.refresh()
+
+        if self.DELIVERY in kinds:
+            sim.network_dispatcher.run_medium(cur_step)
+            active_drones.update(drone.identifier for drone in sim.network_dispatcher.receivers)
+
+        if self.EVENT in kinds:
+            drone = sim.event_generator.handle_events_generation(cur_step, sim.drones)
+            if drone is not None:
+                active_drones.add(drone.identifier)
+            self.schedule(cur_step + sim.event_generation_delay, self.EVENT)
+
+        if self.HELLO in kinds:
+            active_drones = range(sim.n_drones)
+            self.schedule(cur_step + sim.config.hello_delay, self.HELLO)
+
+        for drone_id in sorted(active_drones):
+            drone = sim.drones[drone_id]
+            drone.update_packets(cur_step)
+            drone.routing(sim.drones, sim.depot, cur_step)
+
+            if drone.buffer_length() > 0:
+                # next retransmission, next packet expiry and next entry in the range of the depot
+                delta = sim.drone_retransmission_delta
+                self.wake((cur_step // delta + 1) * delta, drone_id)
+                if not np.isnan(drone.tightest_event_deadline):
+                    self.wake(int(drone.tightest_event_deadline) + 1, drone_id)
+                self.__plan_depot_entry(drone_id, cur_step)
+
+        for drone_id in arrived_drones:
+            if drone_id not in active_drones and sim.drones[drone_id].buffer_length() > 0:
+                self.__plan_depot_entry(drone_id, cur_step)
+
+        next_delivery = sim.network_dispatcher.next_send_ts(cur_step)
+        if next_delivery is not None and next_delivery != self.next_delivery:
+            self.next_delivery = next_delivery
+            self.schedule(next_delivery, self.DELIVERY)
+
+        if self.OBSERVE in kinds:
+            # the end of the step, once all the drones moved
+            self.__fly_to(cur_step + 1)
+            sim.close_step(cur_step)
+            self.schedule_observe(cur_step + 1)
+
+    def __plan_depot_entry(self, drone_id, cur_step):
+        """ The drone is at the beginning of cur_step and flies straight to its next target from the move of cur_step.
+            After j moves it is at distance a = j * d along the segment, until it reaches the target (about L / d
+            moves): it enters the range R of the depot at the first j such that |p + a * u - depot| <= R.
+            Wake it up at that step, or at its arrival if it does not enter the range on this segment.
+            Both the steps are lower bounds: the drone is checked (and planned again) one step early at most.
+        """
+        target = self.drones_state.next_target(drone_id)
+        if self.plans[drone_id] is not None and self.plans[drone_id][0] == target and self.plans[drone_id][1] > cur_step:
+            return  # still on the same segment, the plan holds
+
+        p_x, p_y = self.simulator.drones[drone_id].coords
+        target_x, target_y = target
+        d = self.simulator.time_step_duration * self.simulator.drones[drone_id].speed
+        length = math.hypot(target_x - p_x, target_y - p_y)
+        if d <= 0 or length == 0:  # the target is reached (or the drone is still) with the next move
+            self.__arrival(cur_step + 1, drone_id, target)
+            return
+
+        # the segment of the distances a in which the drone is in the range: a^2 + 2 * b * a + c <= 0
+        u_x, u_y = (target_x - p_x) / length, (target_y - p_y) / length
+        to_depot_x, to_depot_y = p_x - self.depot_coords[0], p_y - self.depot_coords[1]
+        b = u_x * to_depot_x + u_y * to_depot_y
+        c = to_depot_x ** 2 + to_depot_y ** 2 - (self.depot_range[drone_id] + RANGE_MARGIN) ** 2
+        delta = b * b - c
+        if delta >= 0:
+            # the drone stops on the target: after j moves it is at min(j * d, L) along the segment
+            enter, leave = -b - math.sqrt(delta), -b + math.sqrt(delta)
+            if enter <= length and leave >= min(d, length):
+                step = cur_step + max(1, math.floor(enter / d))
+                self.plans[drone_id] = (target, step)
+                self.arrival_steps[drone_id] = None
+                self.wake(step, drone_id)
+                return
+
+        arrival = cur_step + max(1, math.ceil(length / d) - 1)
+        if not self.__plan_mission_entry(drone_id, cur_step, arrival, target):
+            self.__arrival(arrival, drone_id, target)
+
+    def __plan_mission_entry(self, drone_id, cur_step, arrival, target):
+        """ The drone flies its mission and reaches its target at arrival (a lower bound), then it flies the next
+            segments of the mission trajectory (see src.utilities.trajectory). Wake it up at its first entry in the
+            range of the depot along a round of the mission, one step early for each segment crossed: the steps of
+            the trajectory are rounded per segment. False if the drone is not on its mission or never enters the range.
+        """
+        drones_state = self.drones_state
+        if (drones_state.move_routing[drone_id] or drones_state.come_back_to_mission[drone_id]
+                or drones_state.last_move_routing[drone_id]):
+            return False
+
+        drone = self.simulator.drones[drone_id]
+        trajectory = drone.mission_trajectory()
+        if self.entries[drone_id] is None or self.entries[drone_id][0] is not trajectory:
+            radius = self.depot_range[drone_id] + RANGE_MARGIN
+            self.entries[drone_id] = (trajectory, trajectory.range_entries(self.depot_coords, radius))
+        entries = self.entries[drone_id][1]
+
+        # the segments of a round of the mission, from the one after the target, and the steps to their beginning
+        n_segments = len(trajectory)
+        segments = (drone.current_waypoint + 1 + np.arange(n_segments)) % n_segments
+        first_steps = (trajectory.first_steps[segments] - trajectory.first_steps[segments[0]]) % trajectory.period
+
+        enter = entries[segments] >= 0
+        if not enter.any():
+            return False
+        steps = arrival + first_steps + entries[segments] - np.arange(1, n_segments + 1)
+        step = max(cur_step + 1, int(steps[enter].min()))
+        self.plans[drone_id] = (target, step)
+        self.arrival_steps[drone_id] = None
+        self.wake(step, drone_id)
+        return True
+
+    def __arrival(self, step, drone_id, target):
+        """ plan the drone again at the given step, the previous arrival (if any) is no more valid """
+        self.plans[drone_id] = (target, step)
+        if self.arrival_steps[drone_id] != step:
+            self.arrival_steps[drone_id] = step
+            self.schedule(step, self.ARRIVAL, drone_id)
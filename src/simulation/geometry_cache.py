@@ -0,0 +1,84 @@
+import numpy as np
+
+from src.utilities import utilities as util
+
+"""
+This file contains the per-step geometry cache of the simulator. The drone-to-drone and drone-to-depot distances
+are computed once per step with numpy and then queried by drone id, from the medium and the routing algorithms.
+The cache is refreshed at the beginning of every step, the drones that move during the step are invalidated
+and their distances are computed again on demand.
+"""
+
+
+class GeometryCache:
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.depot_coords = np.asarray(simulator.depot_coordinates, dtype=float)
+
+        self.coords = None          # the positions of the drones (n_drones, 2), None if not computed yet
+        self.depot_distances = None  # the distance of every drone from the depot
+        self.rows = {}               # { drone id : distances of the drone from all the drones }
+        self.moved = set()           # the drones that moved after the computation of the cache
+
+    def refresh(self):
+        """ a new step begins, the distances will be computed again at the first query """
+        self.coords = None
+        self.depot_distances = None
+        self.rows = {}
+        self.moved = set()
+
+    def invalidate(self, drone_id):
+        """ the drone moved, its cached distances are no more valid """
+        self.moved.add(drone_id)
+
+    def distance(self, drone_id, other_drone_id):
+        """ the distance between two drones """
+        if drone_id in self.moved or other_drone_id in self.moved:
+            drones = self.simulator.drones
+            return util.euclidean_distance(drones[drone_id].coords, drones[other_drone_id].coords)
+
+        if other_drone_id in self.rows:
+            return float(self.rows[other_drone_id][drone_id])
+        return float(self.distances_from(drone_id)[other_drone_id])
+
+    def distances_from(self, drone_id):
+        """ the distances of the drone from all the drones (numpy array indexed by drone id), the entries
+            of the drones that moved in this step are not valid, use distance() for them """
+        if drone_id in self.moved:
+            return self.__compute_distances(np.asarray(self.simulator.drones[drone_id].coords, dtype=float))
+
+        if drone_id not in self.rows:
+            self.rows[drone_id] = self.__compute_distances(self.__coords()[drone_id])
+        return self.rows[drone_id]
+
+    def within(self, drone_id, radius):
+        """ the (drone id, distance) of the other drones within radius from the drone, sorted by drone id.
+            Valid only if no drone moved in this step """
+        assert not self.moved
+        distances = self.distances_from(drone_id)
+        ids = np.flatnonzero(distances <= radius)
+        return [(other_id, distance) for other_id, distance in zip(ids.tolist(), distances[ids].tolist())
+                if other_id != drone_id]
+
+    def depot_distance(self, drone_id):
+        """ the distance of the drone from the depot """
+        if drone_id in self.moved:
+            return util.euclidean_distance(self.simulator.depot_coordinates, self.simulator.drones[drone_id].coords)
+
+        if self.depot_distances is None:
+            self.depot_distances = self.__compute_distances(self.depot_coords)
+        return float(self.depot_distances[drone_id])
+
+    def __coords(self):
+        if self.coords is None:
+            if self.simulator.drones_state is not None:
+                self.coords = self.simulator.drones_state.coords.copy()
+            else:
+                self.coords = np.array([drone.coords for drone in self.simulator.drones], dtype=float)
+        return self.coords
+
+    def __compute_distances(self, point):
+        """ the distances of all the drones from the point """
+        coords = self.__coords()
+        return np.sqrt((point[0] - coords[:, 0]) ** 2 + (point[1] - coords[:, 1]) ** 2)
@@ -2,21 +2,23 @@
 
 import numpy as np
 import pickle
-import pandas as pd
-import seaborn as sb
 import json
-import matplotlib.pyplot as plt
+import os
+import tempfile
 
 from src.entities.uav_entities import DataPacket
 from collections import defaultdict
 from src.utilities import utilities as util
-from src.utilities import config
+from src.utilities import columnar
 
 """ Metrics class keeps track of all the metrics during all the simulation. """
 
 
 class Metrics:
 
+    # the TTL of the records of drones_packets: the one at the end of the simulation (the packets are kept in memory)
+    DRONES_PACKETS_TTL = "final"
+
     def __init__(self, simulator):
 
         self.simulator = simulator
@@ -48,83 +50,109 @@ class Metrics:
 
         self.time_on_active_routing = 0
 
+        # online counters and tables, updated at each record -> score() and other_metrics() in O(1)
+        self.n_events = 0
+        self.n_events_not_listened = 0
+        self.detected_events = set()     # the ids of the events with a packet
+        self.event_best_delivery = {}    # { event id : min time between the event and the delivery of its packets }
+        self.best_delivery_sum = 0       # the sum of event_best_delivery
+        self.n_packets_to_depot = 0
+        self.packet_delivery_sum = 0     # the sum of the times between the creation and the delivery of the packets
+        self.depot_packets_counted = 0   # the depot packets already added to all_data_packets_in_simulation
+
+    # the records of the simulation
+    def event_generated(self, event):
+        """ all the events generated during the simulation """
+        self.n_events += 1
+        self.events.add(event)
+
+    def event_not_listened(self, event):
+        """ the events not listened due to move routing """
+        self.n_events_not_listened += 1
+        self.events_not_listened.add(event)
+
+    def packet_generated(self, packet):
+        """ all the packets generated by the drones, either delivered or not """
+        self.detected_events.add(packet.event_ref.identifier)
+        self.drones_packets.add(packet)
+
+    def packet_delivered(self, packet, cur_step):
+        """ the packet notified to the depot at cur_step """
+        self.drones_packets_to_depot_list.append((packet, cur_step))
+        if (packet, cur_step) not in self.drones_packets_to_depot:
+            self.drones_packets_to_depot.add((packet, cur_step))
+            self.delivery_times(packet, cur_step)
+
+    def delivery_times(self, packet, cur_step):
+        """ update the delivery times with a new delivery of the packet """
+        self.n_packets_to_depot += 1
+
+        # time between packet generation and packet delivery to depot
+        self.packet_delivery_sum += cur_step - packet.time_step_creation
+
+        # time between event generation and packet delivery to depot, the best one for the event
+        event_id = packet.event_ref.identifier
+        delivery_time = cur_step - packet.event_ref.current_time
+        if event_id not in self.event_best_delivery:
+            self.event_best_delivery[event_id] = delivery_time
+            self.best_delivery_sum += delivery_time
+        elif delivery_time < self.event_best_delivery[event_id]:
+            self.best_delivery_sum += delivery_time - self.event_best_delivery[event_id]
+            self.event_best_delivery[event_id] = delivery_time
+
+    def mean_number_of_relays(self):
+        return np.nanmean(self.mean_numbers_of_possible_relays)
+
     def score(self, undelivered_penalty=1.5):
         """ returns a score for the exectued simulation: 
 
                 sum( event delays )  / number of events
 
-            Notice that, expired or not found events will be counted with a max_delay*penalty
+            Notice that, expired or not found events will be counted with a max_delay*penalty.
+            It is computed in O(1) from the best delivery time of each event, so it can be read at any step
         """
-        # mean delivery time
-        # get best delivery time for each event  
-        all_delivered_events = set([pck.event_ref for pck, _ in self.drones_packets_to_depot])
-        event_delivery_times_dict = {ev.identifier: [] for ev in all_delivered_events}
-
-        # DELIVERY TIME -> METRIC FOR PLOT
-        for pck, delivery_ts in self.drones_packets_to_depot:
-            # time between event generation and packet delivery to depot -> dict to help computation
-            event_delivery_times_dict[pck.event_ref.identifier].append(delivery_ts - pck.event_ref.current_time)
-
-        # maps every event to the minimum delay of the packet arrival to the depot
-        event_delivery_times = []
-        for ev_id in event_delivery_times_dict.keys():
-            event_delivery_times.append(np.nanmin(event_delivery_times_dict[ev_id]))
-
-        not_delivered_events = len(self.events) - len(all_delivered_events) 
+        not_delivered_events = self.n_events - len(self.event_best_delivery)
         assert not_delivered_events >= 0
-         
-        event_delivery_times.extend([undelivered_penalty * self.simulator.event_duration] * not_delivered_events)  # add penalities to not delivered or not found packets
 
-        return np.nanmean(event_delivery_times)       
+        n_events = len(self.event_best_delivery) + not_delivered_events
+        if n_events == 0:
+            return np.float64(np.nan)
+
+        # add penalities to not delivered or not found packets
+        penalties = undelivered_penalty * self.simulator.event_duration * not_delivered_events
+        return np.float64(self.best_delivery_sum + penalties) / n_events
 
     def other_metrics(self):
-        """ Metrics evaluated post execution """
+        """ Metrics evaluated post execution, from the online counters """
 
         # the number of all the events generated during the simulation
-        self.number_of_generated_events = len(self.events)
-        self.number_of_not_generated_events = len(self.events_not_listened)
+        self.number_of_generated_events = self.n_events
+        self.number_of_not_generated_events = self.n_events_not_listened
 
         # the number of all events that the drones discovers, either notified or not
-        all_detected_events = set([pck.event_ref for pck in self.drones_packets])
-        self.number_of_detected_events = len(all_detected_events)
+        self.number_of_detected_events = len(self.detected_events)
 
         # the number of all events that the drones notify (before the event deadline) to the depot
-        all_delivered_events = set([pck.event_ref for pck, _ in self.drones_packets_to_depot])
+        self.number_of_events_to_depot = len(self.event_best_delivery)
+        self.number_of_packets_to_depot = self.n_packets_to_depot  # may contain duplicates
 
-        self.number_of_events_to_depot = len(all_delivered_events)
-        self.number_of_packets_to_depot = len(self.drones_packets_to_depot)  # may contain duplicates
-        
-        # NOTE: THE DEPOT PACKETS ARE NOT COUNTED, WE ADD THEM HERE!! 
-        self.all_data_packets_in_simulation += len(self.drones_packets_to_depot)
-
-        # mean delivery time 
-        packet_delivery_times = []
-
-        # maps an event to the time steps in which it was delivered
-        event_delivery_times_dict = {ev.identifier: [] for ev in all_delivered_events}
-
-        # DELIVERY TIME -> METRIC FOR PLOT
-        for pck, delivery_ts in self.drones_packets_to_depot:
-            # time between packet generation and packet delivery to depot
-            packet_delivery_times.append(delivery_ts - pck.time_step_creation)
-
-            # time between event generation and packet delivery to depot -> dict to help computation
-            event_delivery_times_dict[pck.event_ref.identifier].append(delivery_ts - pck.event_ref.current_time)
+        # NOTE: THE DEPOT PACKETS ARE NOT COUNTED, WE ADD THEM HERE!! (just once, other_metrics may be called again)
+        self.all_data_packets_in_simulation += self.n_packets_to_depot - self.depot_packets_counted
+        self.depot_packets_counted = self.n_packets_to_depot
 
         # maps every event to the minimum delay of the packet arrival to the depot
-        event_delivery_times = []
-        for ev_id in event_delivery_times_dict.keys():
-            event_delivery_times.append(np.nanmin(event_delivery_times_dict[ev_id]))
+        self.event_delivery_times = list(self.event_best_delivery.values())
 
         # averaged delays over all packets/events
-        self.event_delivery_times = event_delivery_times
-        self.packet_mean_delivery_time = np.mean(packet_delivery_times)
-        self.event_mean_delivery_time = np.mean(event_delivery_times)
+        self.packet_mean_delivery_time = (np.float64(self.packet_delivery_sum) / self.n_packets_to_depot
+                                          if self.n_packets_to_depot > 0 else np.float64(np.nan))
+        self.event_mean_delivery_time = (np.float64(self.best_delivery_sum) / len(self.event_delivery_times)
+                                         if self.event_delivery_times else np.float64(np.nan))
 
     def print_overall_stats(self):
         """ print the overall stats of the alg execution """
         self.other_metrics()
-        print("Mean number of relays: ", np.nanmean(self.mean_numbers_of_possible_relays))
+        print("Mean number of relays: ", self.mean_number_of_relays())
         print("number_of_generated_events", self.number_of_generated_events)
         print("number_of_detected_events", self.number_of_detected_events)
         print("all_control_packets_in_simulation", self.all_control_packets_in_simulation)
@@ -161,8 +189,8 @@ class Metrics:
             "time_on_active_routing" : str(self.time_on_active_routing)
         }
 
-    def __dictionary_represenation(self):
-        """ compute the dictionary to save as json """
+    def __summary(self):
+        """ compute the scalar metrics and the mission setup """
         self.other_metrics()
 
         out_results = {"mission_setup": self.mission_setup}
@@ -177,16 +205,88 @@ class Metrics:
         out_results["time_on_mission"] = self.time_on_mission
         out_results["all_control_packets_in_simulation"] = self.all_control_packets_in_simulation
         out_results["all_data_packets_in_simulation"] = self.all_data_packets_in_simulation
-        out_results["all_events"] = [ev.to_json() for ev in self.events]
-        out_results["not_listened_events"] = [ev.to_json() for ev in self.events_not_listened]
-        out_results["events_delivery_times"] = [str(e) for e in self.event_delivery_times]
-        out_results["drones_packets"] = [pck.to_json() for pck in self.drones_packets]
-        out_results["drones_to_depot_packets"] = [(pck.to_json(), delivery_ts) for pck, delivery_ts in self.drones_packets_to_depot]
         out_results["score"] = self.score()
-        out_results["mean_number_of_relays"] = np.nanmean(self.mean_numbers_of_possible_relays)
+        out_results["mean_number_of_relays"] = self.mean_number_of_relays()
+        out_results["drones_packets_ttl"] = self.DRONES_PACKETS_TTL
+
+        return out_results
+
+    def __dictionary_represenation(self):
+        """ compute the dictionary to save as json """
+        out_results = self.__summary()
+        out_results["all_events"] = list(self.records("all_events"))
+        out_results["not_listened_events"] = list(self.records("not_listened_events"))
+        out_results["events_delivery_times"] = [str(e) for e in self.event_delivery_times]
+        out_results["drones_packets"] = list(self.records("drones_packets"))
+        out_results["drones_to_depot_packets"] = list(self.records("drones_to_depot_packets"))
 
         return out_results
 
+    def records(self, name):
+        """ the json records of the events (all_events, not_listened_events), of the packets (drones_packets)
+            and of the deliveries (drones_to_depot_packets) """
+        if name == "all_events":
+            return (ev.to_json() for ev in self.events)
+        elif name == "not_listened_events":
+            return (ev.to_json() for ev in self.events_not_listened)
+        elif name == "drones_packets":
+            return (pck.to_json() for pck in self.drones_packets)
+        elif name == "drones_to_depot_packets":
+            return ((pck.to_json(), delivery_ts) for pck, delivery_ts in self.drones_packets_to_depot)
+
+    def records_count(self, name):
+        """ the number of records of records(name) """
+        return len({"all_events": self.events,
+                    "not_listened_events": self.events_not_listened,
+                    "drones_packets": self.drones_packets,
+                    "drones_to_depot_packets": self.drones_packets_to_depot}[name])
+
+    def __record_values(self, name, field, index=None):
+        """ the values of the field of the records, of their element index if the records are tuples """
+        for record in self.records(name):
+            if index is not None:
+                record = record[index]
+            yield record if field is None else record[field]
+
+    def __records_columns(self, name, fields, index=None):
+        """ the columns of the records (Event.to_json or Packet.to_json), one per field plus the coordinates.
+            Each column reads the records again, in chunks, while it is written """
+        count = self.records_count(name)
+        columns = {name + "_coord": columnar.Column(float, (count, 2), columnar.chunks(
+            self.__record_values(name, "coord", index), float))}
+        for field in fields:
+            columns[name + "_" + field] = columnar.Column(np.int64, (count,), columnar.chunks(
+                self.__record_values(name, field, index), np.int64))
+        return columns
+
+    def save_as_npz(self, filename):
+        """ save all the metrics into a columnar npz file (see src.utilities.columnar):
+            the scalar metrics in the header, the events and the packets in typed columns, written in chunks """
+        header = self.__summary()
+
+        event_fields = ["i_gen", "i_dead", "id"]
+        packet_fields = ["i_gen", "i_dead", "id", "TTL", "id_event"]
+
+        columns = {}
+        columns.update(self.__records_columns("all_events", event_fields))
+        columns.update(self.__records_columns("not_listened_events", event_fields))
+        columns["events_delivery_times"] = np.array(self.event_delivery_times, dtype=float)
+        columns.update(self.__records_columns("drones_packets", packet_fields))
+        columns.update(self.__records_columns("drones_to_depot_packets", packet_fields, index=0))
+        columns["drones_to_depot_packets_delivery_ts"] = columnar.Column(
+            np.int64, (self.records_count("drones_to_depot_packets"),),
+            columnar.chunks(self.__record_values("drones_to_depot_packets", None, index=1), np.int64))
+
+        columnar.save_columns(filename, header, columns)
+
+    @staticmethod
+    def summary_from_file(filename):
+        """ the scalar metrics and the mission setup saved in a json or npz file """
+        if filename.endswith(".npz"):
+            return columnar.load_header(filename)
+        with open(filename, 'r') as fp:
+            return json.load(fp)
+
     def save(self, filename):
         """ save the metrics on file """
         with open(filename, 'wb') as out:
@@ -207,6 +307,10 @@ class Metrics:
         f.write(js)
         f.close()
 
+    def close(self):
+        """ release what the metrics keep out of memory, once they are saved: nothing for these """
+        pass
+
     def __str__(self):
         return self.__repr__()
 
@@ -214,5 +318,111 @@ class Metrics:
         return str(self.__dictionary_represenation())
 
 
+class RunningMean:
+    """ a list of numbers that keeps just their sum and their count, for their mean """
+
+    def __init__(self):
+        self.sum = 0
+        self.count = 0
+
+    def append(self, value):
+        self.sum += value
+        self.count += 1
+
+    def mean(self):
+        return np.float64(self.sum) / self.count if self.count > 0 else np.float64(np.nan)
+
+
+class StreamingMetrics(Metrics):
+    """ Metrics with bounded memory: it keeps just the online counters and tables of Metrics, the records of the events
+        and of the packets are appended to a log on disk (log_dir) and read back only to save them.
+        The log is deleted by close, once the metrics are saved.
+        Notice that the packets are logged when generated, with the TTL of that time (-1, no hop yet) and not with
+        the one at the end of the simulation: the saved metrics tell it with "drones_packets_ttl".
+    """
+
+    DRONES_PACKETS_TTL = "generation"
+
+    def __init__(self, simulator, log_dir):
+        super().__init__(simulator)
+
+        self.mean_numbers_of_possible_relays = RunningMean()
+
+        # the packets delivered in the step of the last delivery, a packet is counted once per step
+        self.delivery_step = None
+        self.step_deliveries = set()
+
+        self.log_dir = log_dir
+        self.log_filename = None
+        self.log = None
+        self.log_counts = defaultdict(int)  # the number of records of each name in the log
+
+    def __log(self, name, record):
+        if self.log is None:
+            # a name of its own: many simulations with the same name may run at once, in one or more processes
+            util.make_path(self.log_dir + self.simulator.simulation_name)
+            fd, self.log_filename = tempfile.mkstemp(prefix=self.simulator.simulation_name + "_", suffix=".jsonl",
+                                                     dir=self.log_dir or None)
+            self.log = os.fdopen(fd, "w")
+        self.log.write(json.dumps({name: record}) + "\n")
+        self.log_counts[name] += 1
+
+    def event_generated(self, event):
+        self.n_events += 1
+        self.__log("all_events", event.to_json())
+
+    def event_not_listened(self, event):
+        self.n_events_not_listened += 1
+        self.__log("not_listened_events", event.to_json())
+
+    def packet_generated(self, packet):
+        self.detected_events.add(packet.event_ref.identifier)
+        self.__log("drones_packets", packet.to_json())
+
+    def packet_delivered(self, packet, cur_step):
+        if cur_step != self.delivery_step:
+            self.delivery_step = cur_step
+            self.step_deliveries = set()
+        if packet.identifier in self.step_deliveries:
+            return
+        self.step_deliveries.add(packet.identifier)
+
+        self.delivery_times(packet, cur_step)
+        self.__log("drones_to_depot_packets", (packet.to_json(), cur_step))
+
+    def mean_number_of_relays(self):
+        return self.mean_numbers_of_possible_relays.mean()
+
+    def records_count(self, name):
+        return self.log_counts[name]
+
+    def records(self, name):
+        if self.log is None:
+            return iter(())
+        self.log.flush()
+        return self.__read_records(name)
+
+    def __read_records(self, name):
+        with open(self.log_filename) as f:
+            for line in f:
+                record = json.loads(line)
+                if name in record:
+                    yield record[name]
+
+    def close(self):
+        """ close and delete the log, its records are no more available """
+        if self.log is not None:
+            self.log.close()
+            os.remove(self.log_filename)
+        self.log = None
+        self.log_filename = None
+        self.log_counts.clear()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["log"] = None  # the log stays on disk, until close
+        return state
+
+
 if __name__ == "__main__":
     m = Metrics().from_file("data/experiments/test_stats.pickle")
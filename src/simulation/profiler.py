@@ -0,0 +1,122 @@
+import json
+import time
+
+"""
+This file contains the per-phase profiler of the simulator. When src.utilities.config.PROFILE_SIM is enabled, the
+methods of each phase of a step are wrapped on their instances (the simulator, the drones, their routing algorithms,
+...) to count their calls and their wall time, nothing is wrapped otherwise and the profiler costs nothing.
+The report is printed as a table at the end of the run and saved as json next to the metrics.
+"""
+
+# the phases of a step: (name, the phase it is part of)
+PHASES = [("geometry", None),
+          ("run_medium", None),
+          ("handle_events_generation", None),
+          ("update_packets", None),
+          ("routing", None),
+          ("hello", "routing"),
+          ("send_packets", "routing"),
+          ("relay_selection", "send_packets"),
+          ("move", None),
+          ("increase_meetings_probs", None),
+          ("plot", None)]
+
+
+class PhaseStats:
+    """ the calls and the wall time of a phase """
+    __slots__ = ("calls", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+
+class TimedMethod:
+    """ a bound method that adds its calls and its wall time to the stats of its phase """
+    __slots__ = ("method", "stats")
+
+    def __init__(self, method, stats: PhaseStats):
+        self.method = method
+        self.stats = stats
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.method(*args, **kwargs)
+        finally:
+            self.stats.seconds += time.perf_counter() - start
+            self.stats.calls += 1
+
+
+class PhaseProfiler:
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.stats = {name: PhaseStats() for name, _ in PHASES}
+        self.total_seconds = 0.0
+        self.start_time = None
+
+    def wrap(self, obj, method_name, phase):
+        """ time the method of the object (not of its class) as part of the phase """
+        setattr(obj, method_name, TimedMethod(getattr(obj, method_name), self.stats[phase]))
+
+    def install(self):
+        """ wrap the methods of all the phases, once the entities of the simulation are created """
+        sim = self.simulator
+        self.wrap(sim.spatial_index, "build", "geometry")
+        self.wrap(sim.geometry, "refresh", "geometry")
+        self.wrap(sim.network_dispatcher, "run_medium", "run_medium")
+        self.wrap(sim.event_generator, "handle_events_generation", "handle_events_generation")
+        self.wrap(sim, "increase_meetings_probs", "increase_meetings_probs")
+        self.wrap(sim, "_Simulator__plot", "plot")
+        if sim.drones_state is not None:
+            self.wrap(sim.drones_state, "move", "move")
+            self.wrap(sim.drones_state, "fly", "move")
+
+        for drone in sim.drones:
+            self.wrap(drone, "update_packets", "update_packets")
+            self.wrap(drone, "routing", "routing")
+            self.wrap(drone, "move", "move")
+            self.wrap(drone.routing_algorithm, "drone_identification", "hello")
+            self.wrap(drone.routing_algorithm, "send_packets", "send_packets")
+            self.wrap(drone.routing_algorithm, "relay_selection", "relay_selection")
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        self.total_seconds += time.perf_counter() - self.start_time
+
+    def report(self):
+        """ the stats of the phases { phase : {calls, seconds, share of the run} }, "other" is the time of the run
+            out of the phases (the loop, the progress bar, ...)
+        """
+        total = self.total_seconds
+        report = {}
+        for name, parent in PHASES:
+            stats = self.stats[name]
+            report[name] = {"parent": parent, "calls": stats.calls, "seconds": stats.seconds,
+                            "share": stats.seconds / total if total > 0 else 0.0}
+
+        other = total - sum(self.stats[name].seconds for name, parent in PHASES if parent is None)
+        report["other"] = {"parent": None, "calls": 0, "seconds": other, "share": other / total if total > 0 else 0.0}
+        return {"total_seconds": total, "steps": self.simulator.len_simulation, "phases": report}
+
+    def print_report(self):
+        report = self.report()
+        print("Profile of the simulation: " + str(round(report["total_seconds"], 3)) + " sec, "
+              + str(report["steps"]) + " steps")
+        print("{:<28}{:>12}{:>12}{:>14}{:>8}".format("phase", "calls", "sec", "us/call", "%"))
+        for name, stats in report["phases"].items():
+            depth = 0
+            parent = stats["parent"]
+            while parent is not None:
+                depth += 1
+                parent = report["phases"][parent]["parent"]
+            per_call = stats["seconds"] / stats["calls"] * 1e6 if stats["calls"] > 0 else 0.0
+            print("{:<28}{:>12}{:>12.3f}{:>14.1f}{:>8.1f}".format("  " * depth + name, stats["calls"], stats["seconds"],
+                                                                 per_call, stats["share"] * 100))
+
+    def save(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.report(), f, indent=2)
@@ -0,0 +1,71 @@
+from dataclasses import dataclass, fields, replace
+
+from src.utilities import config
+
+"""
+This file contains the configuration of a simulation: the globals of src.utilities.config that the entities read while
+the simulation runs (the parameters of the Simulator are not here, they are its arguments). The configuration is
+frozen and hashable, each Simulator owns one (Simulator.config) and all its components read it from there, so that
+simulations with different settings can run in the same process. The globals of src.utilities.config are just the
+defaults, read when the configuration is created:
+
+    SimulationConfig.from_module(hello_delay=10, discrete_events=True)
+"""
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """ each field is the lowercase name of the global of src.utilities.config it comes from """
+
+    # paths of the drones
+    circle_path: bool
+    demo_path: bool
+    path_from_json: bool
+    jsons_path_prefix: str
+    random_steps: tuple
+    random_start_point: bool
+
+    # routing and channel
+    hello_delay: int
+    old_hello_packet: int
+    lil_delta: int
+    guassian_scale: float
+    enable_probabilities: bool
+
+    # engines
+    vectorized_drones: bool
+    discrete_events: bool
+
+    # metrics and outputs
+    streaming_metrics: bool
+    metrics_format: str
+    metrics_log_dir: str
+    root_evaluation_data: str
+    live_score_delay: int
+    profile_sim: bool
+    state_hash_delay: int
+    state_hash_dir: str
+    debug: bool
+
+    # drawing
+    save_plot: bool
+    save_plot_dir: str
+    skip_sim_step: int
+    wait_sim_step: float
+    is_show_next_target_vec: bool
+
+    # the fields that don't change the results of a simulation (outputs, printing, drawing)
+    UI_FIELDS = ("metrics_log_dir", "root_evaluation_data", "live_score_delay", "profile_sim", "state_hash_delay",
+                 "state_hash_dir", "debug", "save_plot", "save_plot_dir", "skip_sim_step", "wait_sim_step",
+                 "is_show_next_target_vec")
+
+    @classmethod
+    def from_module(cls, module=config, **overrides):
+        """ the configuration with the current globals of the module (src.utilities.config), and the given overrides """
+        values = {field.name: getattr(module, field.name.upper()) for field in fields(cls)}
+        values["random_steps"] = tuple(values["random_steps"])
+        return replace(cls(**values), **overrides)
+
+    def results_fields(self):
+        """ the fields that may change the results of a simulation { name : value } """
+        return {field.name: getattr(self, field.name) for field in fields(self) if field.name not in self.UI_FIELDS}
@@ -1,15 +1,23 @@
 
-from src.drawing import pp_draw
 from src.entities.uav_entities import *
-from src.simulation.metrics import Metrics
+from src.entities.drones_state import DronesState, DroneView
+from src.simulation.event_scheduler import EventScheduler
+from src.simulation.geometry_cache import GeometryCache
+from src.simulation.metrics import Metrics, StreamingMetrics
+from src.simulation.profiler import PhaseProfiler
+from src.simulation.simulation_config import SimulationConfig
+from src.simulation.state_hash import StateHasher
 from src.utilities import config, utilities
+from src.utilities.spatial_index import SpatialGrid
 from src.routing_algorithms.net_routing import MediumDispatcher
+from src.routing_algorithms.channel_model import ChannelModel
 from collections import defaultdict
 from tqdm import tqdm
 
 import numpy as np
 import math
 import time
+import uuid
 
 """
 This file contains the Simulation class. It allows to explicit all the relevant parameters of the simulation,
@@ -44,7 +52,11 @@ class Simulator:
                  routing_algorithm=config.ROUTING_ALGORITHM,
                  communication_error_type=config.CHANNEL_ERROR_TYPE,
                  prob_size_cell_r=config.CELL_PROB_SIZE_R,
-                 simulation_name=""):
+                 simulation_name="",
+                 simulation_config=None):
+        # the globals of src.utilities.config read while running (see simulation.simulation_config)
+        self.config = SimulationConfig.from_module() if simulation_config is None else simulation_config
+
         self.drone_com_range = drone_com_range
         self.drone_sen_range = drone_sen_range
         self.drone_speed = drone_speed
@@ -66,6 +78,9 @@ class Simulator:
         self.event_generation_delay = event_generation_delay
         self.packets_max_ttl = packets_max_ttl
         self.show_plot = show_plot
+        self.progress_bar = None  # the progress bar of the running simulation, if any
+        self.step_callback = None  # called with (simulator, cur_step, score) every LIVE_SCORE_DELAY steps
+        self.stopped = False  # set by the step callback to stop the simulation early
         self.routing_algorithm = routing_algorithm
         self.communication_error_type = communication_error_type
 
@@ -74,12 +89,16 @@ class Simulator:
         self.prob_size_cell = int(self.drone_com_range * self.prob_size_cell_r)
         self.cell_prob_map = defaultdict(lambda: [0, 0, 0])
 
-        self.sim_save_file = config.SAVE_PLOT_DIR + self.__sim_name()
+        self.sim_save_file = self.config.save_plot_dir + self.__sim_name()
         self.path_to_depot = None
 
         # Setup vari
+        # the ids of the events and of the packets
+        self.event_ids = utilities.IdAllocator()
+        self.packet_ids = utilities.IdAllocator()
+
         # for stats
-        self.metrics = Metrics(self)
+        self.metrics = StreamingMetrics(self, self.config.metrics_log_dir) if self.config.streaming_metrics else Metrics(self)
 
         # setup network
         self.__setup_net_dispatcher()
@@ -94,8 +113,21 @@ class Simulator:
         self.start = time.time()
         self.event_generator = utilities.EventGenerator(self)
 
+        # the wall time of each phase of the steps, the methods are wrapped only if enabled
+        self.profiler = None
+        if self.config.profile_sim:
+            self.profiler = PhaseProfiler(self)
+            self.profiler.install()
+
+        # the hashes of the state of the simulation every config.state_hash_delay steps, to check the determinism
+        self.state_hasher = None
+        if self.config.state_hash_delay > 0:
+            # a name of its own: many simulations with the same name may run at once, in one or more processes
+            self.state_hasher = StateHasher(self, self.config.state_hash_dir + self.simulation_name + "_"
+                                            + uuid.uuid4().hex + ".jsonl")
+
     def __setup_net_dispatcher(self):
-        self.network_dispatcher = MediumDispatcher(self.metrics)
+        self.network_dispatcher = MediumDispatcher(self.metrics, self)
 
     def __set_metrics(self):
         """ the method sets up all the parameters in the metrics class """
@@ -113,24 +145,49 @@ class Simulator:
 
         self.__set_random_generators()
 
-        self.path_manager = utilities.PathManager(config.PATH_FROM_JSON, config.JSONS_PATH_PREFIX, self.seed)
+        self.path_manager = utilities.PathManager(self.config.path_from_json, self.config.jsons_path_prefix, self.seed)
         self.environment = Environment(self.env_width, self.env_height, self)
 
         self.depot = Depot(self.depot_coordinates, self.depot_com_range, self)
 
+        # the channel of the drones, for the receivers of the broadcasts
+        self.channel_model = ChannelModel(self, self.drone_com_range)
+
         self.drones = []
+        paths = [self.path_manager.path(i, self) for i in range(self.n_drones)]
+
+        # the discrete-event engine works only if the routing is done on the scheduled actions
+        discrete_events = self.config.discrete_events and EventScheduler.is_schedulable(self.routing_algorithm.value)
+        if self.config.discrete_events and not discrete_events:
+            print("The routing algorithm " + str(self.routing_algorithm) + " cannot run on discrete events, "
+                  "running it step by step")
+
+        # the drones are views over the numpy arrays of the drones state
+        self.drones_state = DronesState(paths, self) if self.config.vectorized_drones or discrete_events else None
 
         # drone 0 is the first
         for i in range(self.n_drones):
-            self.drones.append(Drone(i, self.path_manager.path(i, self), self.depot, self))
+            if self.drones_state is None:
+                self.drones.append(Drone(i, paths[i], self.depot, self))
+            else:
+                self.drones.append(DroneView(i, paths[i], self.depot, self, self.drones_state))
 
         self.environment.add_drones(self.drones)
         self.environment.add_depot(self.depot)
 
+        # the drones in the cells around a drone are the only ones that can be in its range
+        self.spatial_index = SpatialGrid(self.drone_com_range)
+
+        # the distances among drones and from the depot, computed once per step
+        self.geometry = GeometryCache(self)
+
+        self.event_scheduler = EventScheduler(self) if discrete_events else None
+
         # Set the maximum distance between the drones and the depot
         self.max_dist_drone_depot = utilities.euclidean_distance(self.depot.coords, (self.env_width, self.env_height))
 
-        if self.show_plot or config.SAVE_PLOT:
+        if self.show_plot or self.config.save_plot:
+            from src.drawing import pp_draw  # imported here, pygame is loaded only to draw
             self.draw_manager = pp_draw.PathPlanningDrawer(self.environment, self, borders=True)
 
 
@@ -144,12 +201,12 @@ class Simulator:
 
     def __plot(self, cur_step):
         """ plot the simulation """
-        if cur_step % config.SKIP_SIM_STEP != 0:
+        if cur_step % self.config.skip_sim_step != 0:
             return
 
         # delay draw
-        if config.WAIT_SIM_STEP > 0:
-            time.sleep(config.WAIT_SIM_STEP)
+        if self.config.wait_sim_step > 0:
+            time.sleep(self.config.wait_sim_step)
 
         # drones plot
         for drone in self.drones:
@@ -166,7 +223,7 @@ class Simulator:
         self.draw_manager.draw_simulation_info(cur_step=cur_step, max_steps=self.len_simulation)
 
         # rendering
-        self.draw_manager.update(show=self.show_plot, save=config.SAVE_PLOT, filename=self.sim_save_file + str(cur_step) + ".png")
+        self.draw_manager.update(show=self.show_plot, save=self.config.save_plot, filename=self.sim_save_file + str(cur_step) + ".png")
 
     def increase_meetings_probs(self, drones, cur_step):
         """ Increases the probabilities of meeting someone. """
@@ -192,14 +249,79 @@ class Simulator:
             old_vals[2] = old_vals[0] / max(1, old_vals[1])
             self.cell_prob_map[index_cell] = old_vals
 
-    def run(self):
-        """ the method starts the simulation """
-        cells_to_travel = None
-        for cur_step in tqdm(range(self.len_simulation)):
+    def observe_delays(self):
+        """ the delays of the steps whose end is observed by close_step, for the discrete-event engine:
+            every step if the simulation is drawn or the probabilities are computed """
+        if self.show_plot or self.config.save_plot or self.config.enable_probabilities:
+            return [1]
+        return [delay for delay in (self.config.state_hash_delay, self.config.live_score_delay) if delay > 0]
+
+    def close_step(self, cur_step):
+        """ the end of a step, once all the drones moved """
+        # in case we need probability map
+        if self.config.enable_probabilities:
+            self.increase_meetings_probs(self.drones, cur_step)
+
+        if self.show_plot or self.config.save_plot:
+            self.__plot(cur_step)
+
+        if self.state_hasher is not None and cur_step % self.config.state_hash_delay == 0:
+            self.state_hasher.record(cur_step)
+
+        if self.config.live_score_delay > 0 and cur_step % self.config.live_score_delay == 0:
+            self.__live_score(cur_step)
+
+    def __live_score(self, cur_step):
+        """ show the score so far on the progress bar and call the step callback, the score is O(1) """
+        score = self.metrics.score()
+        if self.progress_bar is not None:
+            self.progress_bar.set_postfix(score=round(score, 2), refresh=False)
+        if self.step_callback is not None and self.step_callback(self, cur_step, score):
+            self.stopped = True
+
+    def run(self, step_callback=None):
+        """ the method starts the simulation.
+            step_callback(simulator, cur_step, score) is called every config.live_score_delay steps,
+            the simulation stops early if it returns True
+        """
+        self.step_callback = step_callback
+        if self.profiler is not None:
+            self.profiler.start()
+
+        if self.event_scheduler is not None:
+            self.__run_events()
+        else:
+            self.__run_steps()
+
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler.print_report()
+        if self.state_hasher is not None:
+            self.state_hasher.close()
+
+        if self.config.debug:
+            print("End of simulation, sim time: " + str(self.len_simulation * self.time_step_duration) + " sec, #iteration: " + str(self.len_simulation))
+
+    def __run_events(self):
+        """ the discrete-event simulation, see src.simulation.event_scheduler """
+        self.progress_bar = tqdm(total=self.len_simulation)
+        for clock in self.event_scheduler.run():
+            self.progress_bar.update(clock - self.progress_bar.n)
+            if self.stopped:
+                break
+
+        self.progress_bar.close()
+
+    def __run_steps(self):
+        """ the fixed time-step simulation """
+        self.progress_bar = tqdm(range(self.len_simulation))
+        for cur_step in self.progress_bar:
             self.cur_step = cur_step
             # check for new events and remove the expired ones from the environment
             # self.environment.update_events(cur_step)
             # sense the area and move drones and sense the area
+            self.spatial_index.build(self.drones)
+            self.geometry.refresh()
             self.network_dispatcher.run_medium(cur_step)
 
             # generates events
@@ -214,34 +336,44 @@ class Simulator:
 
                 drone.update_packets(cur_step)
                 drone.routing(self.drones, self.depot, cur_step)
-                drone.move(self.time_step_duration)
+                if self.drones_state is None:
+                    drone.move(self.time_step_duration)
+                    self.geometry.invalidate(drone.identifier)
 
-            # in case we need probability map
-            if config.ENABLE_PROBABILITIES:
-                self.increase_meetings_probs(self.drones, cur_step)
+            if self.drones_state is not None:
+                # all the drones move at once
+                self.drones_state.move(self.time_step_duration)
 
-            if self.show_plot or config.SAVE_PLOT:
-                self.__plot(cur_step)
+            self.close_step(cur_step)
+            if self.stopped:
+                break
 
-        if config.DEBUG:
-            print("End of simulation, sim time: " + str((cur_step + 1) * self.time_step_duration) + " sec, #iteration: " + str(cur_step + 1))
+        self.progress_bar.close()
 
     def close(self):
         """ do some stuff at the end of simulation"""
         print("Closing simulation")
 
         self.print_metrics(plot_id="final")
-        self.save_metrics(config.ROOT_EVALUATION_DATA + self.simulation_name)
+        self.save_metrics(self.config.root_evaluation_data + self.simulation_name)
+        self.metrics.close()
 
     def print_metrics(self, plot_id="final"):
         """ add signature """
         self.metrics.print_overall_stats()
 
     def save_metrics(self, filename_path, save_pickle=False):
-        """ add signature """
-        self.metrics.save_as_json(filename_path + ".json")
+        """ save the metrics in filename_path + ".json" or ".npz", as in config.metrics_format,
+            and the profile of the phases in filename_path + "_profile.json" if config.profile_sim
+        """
+        if self.config.metrics_format == "npz":
+            self.metrics.save_as_npz(filename_path + ".npz")
+        else:
+            self.metrics.save_as_json(filename_path + ".json")
         if save_pickle:
             self.metrics.save(filename_path + ".pickle")
+        if self.profiler is not None:
+            self.profiler.save(filename_path + "_profile.json")
 
     def score(self):
         """ returns a score for the exectued simulation: 
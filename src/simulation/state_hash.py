@@ -0,0 +1,127 @@
+from argparse import ArgumentParser
+import hashlib
+import json
+import os
+
+import numpy as np
+
+"""
+This file contains the determinism check of the simulator. When src.utilities.config.STATE_HASH_DELAY > 0, every
+STATE_HASH_DELAY steps the state of the simulation is hashed, one hash per component:
+    drones  : the coordinates, the mission waypoint, the routing flags and the buffer (by event id) of every drone
+    medium  : the packets waiting on the medium, by send time
+    rng     : the states of the random generators (RANDOM_GENERATORS, paths of attributes of the simulator)
+    metrics : the counters of the metrics
+and the hashes are appended to a small JSONL file in config.STATE_HASH_DIR, named after the simulation with a unique
+suffix (Simulator.state_hasher.filename). Two runs that must give the same results (e.g. the stepped and the
+discrete-event engine) can be compared with:
+
+e.g. python -m src.simulation.state_hash data/state_hashes/run_a.jsonl data/state_hashes/run_b.jsonl
+"""
+
+COMPONENTS = ["drones", "medium", "rng", "metrics"]
+RANDOM_GENERATORS = ["rnd_network", "rnd_routing", "rnd_env", "event_generator.rnd_drones"]
+
+
+def digest(values):
+    """ the hash of a sequence of values (numbers, strings, tuples of them) """
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
+
+
+def packet_state(packet):
+    """ a packet, by its kind, id and event """
+    return type(packet).__name__, packet.identifier, packet.event_ref.identifier, packet.time_step_creation
+
+
+class StateHasher:
+
+    def __init__(self, simulator, filename):
+        self.simulator = simulator
+        self.filename = filename
+        self.file = None
+
+    def drones_state(self):
+        state = []
+        for drone in self.simulator.drones:
+            x, y = drone.coords
+            state.append((drone.identifier, float(x), float(y), drone.current_waypoint, drone.move_routing,
+                          drone.come_back_to_mission,
+                          tuple(packet.event_ref.identifier for packet in drone.all_packets())))
+        return state
+
+    def medium_state(self):
+        packets = self.simulator.network_dispatcher.packets
+        return [(send_ts, tuple((packet_state(packet), src_drone.identifier,
+                                 -2 if dst_drone is None else dst_drone.identifier)
+                                for packet, src_drone, dst_drone in packets[send_ts]))
+                for send_ts in sorted(packets)]
+
+    def rng_state(self):
+        state = []
+        for name in RANDOM_GENERATORS:
+            generator = self.simulator
+            for attribute in name.split("."):
+                generator = getattr(generator, attribute, None)
+            if generator is not None:
+                _, keys, position, has_gauss, cached_gaussian = generator.get_state()
+                state.append((name, hashlib.blake2b(np.ascontiguousarray(keys).tobytes()).hexdigest(),
+                              int(position), int(has_gauss), float(cached_gaussian)))
+        return state
+
+    def metrics_state(self):
+        metrics = self.simulator.metrics
+        return [metrics.n_events, metrics.n_events_not_listened, len(metrics.detected_events),
+                metrics.n_packets_to_depot, metrics.best_delivery_sum, metrics.packet_delivery_sum,
+                metrics.all_control_packets_in_simulation, metrics.all_data_packets_in_simulation,
+                metrics.time_on_mission, metrics.time_on_active_routing]
+
+    def record(self, cur_step):
+        """ append the hashes of the state at the end of cur_step """
+        hashes = {"drones": digest(self.drones_state()),
+                  "medium": digest(self.medium_state()),
+                  "rng": digest(self.rng_state()),
+                  "metrics": digest(self.metrics_state())}
+        record = {"step": cur_step, "state": digest([hashes[component] for component in COMPONENTS]), **hashes}
+
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+            self.file = open(self.filename, "x")  # never the stream of another run
+        self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_hashes(filename):
+    """ the records of the hash stream { step : record } """
+    with open(filename) as f:
+        return {record["step"]: record for record in map(json.loads, f)}
+
+
+def first_divergence(filename_a, filename_b):
+    """ the first step hashed in both the streams where the states differ, and the components that differ,
+        (None, []) if the streams agree on all the common steps
+    """
+    hashes_a, hashes_b = read_hashes(filename_a), read_hashes(filename_b)
+    for step in sorted(set(hashes_a) & set(hashes_b)):
+        if hashes_a[step]["state"] != hashes_b[step]["state"]:
+            return step, [component for component in COMPONENTS if hashes_a[step][component] != hashes_b[step][component]]
+    return None, []
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("hashes_a", action="store", type=str, help="the hash stream of the first run")
+    parser.add_argument("hashes_b", action="store", type=str, help="the hash stream of the second run")
+    args = parser.parse_args()
+
+    step, components = first_divergence(args.hashes_a, args.hashes_b)
+    n_a, n_b = len(read_hashes(args.hashes_a)), len(read_hashes(args.hashes_b))
+    if step is None:
+        print("The runs agree on all the common steps (" + str(min(n_a, n_b)) + " hashes)")
+    else:
+        print("The runs diverge at step " + str(step) + " in: " + ", ".join(components))
+    if n_a != n_b:
+        print("The streams have a different length: " + str(n_a) + " and " + str(n_b) + " hashes")
@@ -0,0 +1,121 @@
+import itertools
+import json
+import os
+import struct
+import uuid
+import zipfile
+
+import numpy as np
+
+"""
+This file contains the columnar binary format of the metrics (.npz). The file is an uncompressed zip, compatible with
+numpy.load, with a small json header (header.json) for the scalar metrics and one typed .npy column per member.
+The columns are written one at a time, either whole or in chunks (see Column), and read back memory-mapped, without
+copying them in memory. A file is written aside and moved in place once complete, it is never seen half written.
+"""
+
+HEADER_NAME = "header.json"
+ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")  # the local file header of a member of a zip
+CHUNK_ROWS = 65536  # the rows of a chunk of a Column
+
+
+class Column:
+    """ a column written in chunks: its dtype, its shape (known in advance, as the header of the .npy comes first)
+        and an iterable of arrays, the chunks of rows, read only while the column is written """
+
+    def __init__(self, dtype, shape, chunks):
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.chunks = chunks
+
+
+def chunks(rows, dtype, chunk_rows=CHUNK_ROWS):
+    """ the rows (an iterable of values or of lists of values) in arrays of chunk_rows rows at most """
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_rows))
+        if not chunk:
+            return
+        yield np.array(chunk, dtype=dtype)
+
+
+def save_columns(filename, header: dict, columns: dict):
+    """ save the header (json serializable) and the columns { name : numpy array or Column }.
+        The file is written in a temporary file of the same directory, that replaces it once complete
+    """
+    tmp_filename = filename + "." + uuid.uuid4().hex + ".tmp"  # a name of its own, the writers may be many
+    try:
+        with open(tmp_filename, "xb") as out, \
+                zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zip_file:
+            zip_file.writestr(HEADER_NAME, json.dumps(header))
+            for name, column in columns.items():
+                with zip_file.open(name + ".npy", "w", force_zip64=True) as f:
+                    if isinstance(column, Column):
+                        write_chunks(f, column)
+                    else:
+                        np.lib.format.write_array(f, np.asarray(column), allow_pickle=False)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+
+def write_chunks(f, column: Column):
+    """ write the .npy of the column, one chunk at a time """
+    np.lib.format.write_array_header_2_0(f, {"descr": np.lib.format.dtype_to_descr(column.dtype),
+                                             "fortran_order": False, "shape": column.shape})
+    rows = 0
+    for chunk in column.chunks:
+        chunk = np.ascontiguousarray(chunk, dtype=column.dtype)
+        assert chunk.shape[1:] == column.shape[1:], "the chunks must have the rows of the column"
+        f.write(chunk.tobytes())
+        rows += len(chunk)
+    assert rows == column.shape[0], "the chunks must have all the rows of the column"
+
+
+def is_complete(filename, names=()):
+    """ True if the file is a complete columnar file, with the header and the columns of the given names """
+    try:
+        with zipfile.ZipFile(filename) as zip_file:
+            members = set(zip_file.namelist())
+    except (OSError, zipfile.BadZipFile):
+        return False
+    return HEADER_NAME in members and all(name + ".npy" in members for name in names)
+
+
+def load_header(filename):
+    """ the header of the file, without reading the columns """
+    with zipfile.ZipFile(filename) as zip_file:
+        return json.loads(zip_file.read(HEADER_NAME))
+
+
+def load_columns(filename):
+    """ the header and the columns { name : read-only memory-mapped numpy array } of the file """
+    with zipfile.ZipFile(filename) as zip_file:
+        header = json.loads(zip_file.read(HEADER_NAME))
+        members = [info for info in zip_file.infolist() if info.filename.endswith(".npy")]
+
+    columns = {}
+    with open(filename, "rb") as f:
+        for info in members:
+            assert info.compress_type == zipfile.ZIP_STORED, "the columns must be stored uncompressed"
+
+            # the data of the member is after its local header, with its own name and extra field lengths
+            f.seek(info.header_offset)
+            local_header = ZIP_LOCAL_HEADER.unpack(f.read(ZIP_LOCAL_HEADER.size))
+            f.seek(info.header_offset + ZIP_LOCAL_HEADER.size + local_header[-2] + local_header[-1])
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            name = info.filename[:-len(".npy")]
+            if np.prod(shape) == 0:
+                columns[name] = np.empty(shape, dtype=dtype)
+            else:
+                columns[name] = np.memmap(filename, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                          order="F" if fortran_order else "C")
+    return header, columns
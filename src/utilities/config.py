@@ -35,10 +35,32 @@ JSONS_PATH_PREFIX = "data/tours/RANDOM_missions{}.json"     # str: the path to t
 RANDOM_STEPS = [250, 500, 700, 900, 1100, 1400]  # the step after each new random directions is taken, in case of dynamic generation
 RANDOM_START_POINT = True  # bool whether the drones start the mission at random positions
 
+# ------------------------------- ENGINE ------------------------------- #
+VECTORIZED_DRONES = False  # bool: whether to keep the drones state in numpy arrays and move all the drones at once,
+                           # notice that in this case the drones route first and then move all together
+DISCRETE_EVENTS = False    # bool: whether to jump from one action (hello, delivery, event...) to the next one instead of
+                           # routing every drone at every step, it uses the drones state engine (VECTORIZED_DRONES).
+                           # Every drone wakes up at each of its hello (every HELLO_DELAY steps): it pays off with many
+                           # drones or large hello delays, with few drones and short delays it is slower than the steps
+
 # ------------------------------- CONSTANTS ------------------------------- #
 
 DEBUG = False                         # bool: whether to print debug strings or not.
+LIVE_SCORE_DELAY = 100                # int: steps, how often the score so far is shown and the step callback of
+                                      # Simulator.run is called, 0 to disable it
+PROFILE_SIM = False                   # bool: whether to measure the wall time of each phase of the steps, the table is
+                                      # printed at the end of the run and saved with the metrics (see simulation.profiler)
+STATE_HASH_DELAY = 0                  # int: steps, how often the state of the simulation is hashed to check that two runs
+                                      # are the same (see simulation.state_hash), 0 to disable it
+STATE_HASH_DIR = "data/state_hashes/"  # str: the directory of the hashes of the states
 EXPERIMENTS_DIR = "data/experiments/"  # output data : the results of the simulation
+METRICS_FORMAT = "json"                # str: the format of the saved metrics, "json" or "npz" (typed columns)
+STREAMING_METRICS = False              # bool: whether to keep just counters and per-event tables in memory and to log
+                                       # the events and the packets on disk (METRICS_LOG_DIR), for long simulations
+METRICS_LOG_DIR = "data/metrics_logs/"  # str: the directory of the logs of the streaming metrics
+BENCHMARKS_DIR = "data/benchmarks/"     # str: the results of the benchmarks of the simulator (see experiments.benchmark)
+RESULT_CACHE_DIR = "data/cache/"       # str: the cache of the results of the simulations, by configuration
+RESULT_CACHE_MAX_SIZE = 2 * 1024 ** 3  # int: bytes, the max size of the cache, the least recently used results are evicted
 
 # drawaing
 PLOT_SIM = True      # bool: whether to plot or not the simulation.
@@ -1,7 +1,7 @@
 import json
 import random
 import math
-import matplotlib.pyplot as plt
+import os
 import numpy as np
 from src.utilities import config
 
@@ -23,16 +23,17 @@ def euclidean_distance(point1, point2):
 
 def next_target(depot_pos, cur_position, residual_autonomy, edge_area, range_decision, random_generator):
     """ return the next position (x,y) along the next autonomy after reached the point"""
-    if residual_autonomy < min(range_decision) * 1.44 + euclidean_distance(depot_pos, cur_position):
-        return depot_pos, max(0, residual_autonomy - euclidean_distance(cur_position, depot_pos))
+    depot_distance = euclidean_distance(depot_pos, cur_position)
+    if residual_autonomy < min(range_decision) * 1.44 + depot_distance:
+        return depot_pos, max(0, residual_autonomy - depot_distance)
     else:
-        feasible_positions = [d for d in range_decision if
-                              d * 1.44 * 2 + euclidean_distance(cur_position, depot_pos) <= residual_autonomy]
+        feasible_positions = [d for d in range_decision if d * 1.44 * 2 + depot_distance <= residual_autonomy]
 
         if len(feasible_positions) == 0:
-            return depot_pos, max(0, residual_autonomy - euclidean_distance(cur_position, depot_pos))
+            return depot_pos, max(0, residual_autonomy - depot_distance)
 
-        d = random_generator.choice(feasible_positions)
+        # the same draw of random_generator.choice(feasible_positions), without converting the list to an array
+        d = feasible_positions[random_generator.randint(0, len(feasible_positions))]
 
         next_point_x = random_generator.randint(max(0, cur_position[0] - d), min(cur_position[0] + d, edge_area))
         next_point_y = random_generator.randint(max(0, cur_position[1] - d), min(cur_position[1] + d, edge_area))
@@ -66,10 +67,22 @@ def get_tour(autonomy, edge_area, depot_pos, random_generator, range_decision=No
     return tour
 
 
+def batch_tours(ndrones, autonomy, edge_area, depot_pos, random_generator, range_decision=None,
+                random_starting_point=True):
+    """ the tours { drone_id : list of waypoints } of ndrones drones, the very same tours of ndrones calls of get_tour
+        with random_generator, with the last point repeated as in to_json
+    """
+    tours = {}
+    for i in range(ndrones):
+        tour = get_tour(autonomy, edge_area, depot_pos, random_generator, range_decision, random_starting_point)
+        tour.append(tour[-1])
+        tours[i] = tour
+    return tours
+
+
 def random_waypoint_tour(ndrones, nrounds, depot, autonomy, edge_area, random_generator):
     drones_tours = {}
     for d in range(ndrones):
-        print(d)
         d_tours = []
         for r in range(nrounds):
             d_tours.append(get_tour(autonomy, edge_area, depot, random_generator=random_generator))
@@ -150,20 +163,33 @@ def run(ndrones, nrounds, autonomy,
         to_json(tours, mission_data, seed)
 
 
-"build the json file tours for the routing "
+def save_tours(seed, ndrones, autonomy, depot, edge_area, mission_data):
+    """ generate the tours of the seed and save them in the tour store, return the name of the file """
+    from src.utilities import tour_store
+
+    tours = batch_tours(ndrones, autonomy, edge_area, depot, random_generator=np.random.RandomState(seed))
+    filename = tour_store.compiled_filename(config.JSONS_PATH_PREFIX.format(seed))
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tour_store.save_tours(filename, tours, mission_data)
+    return filename
+
+
+def tours_library(seeds, ndrones, autonomy, depot, edge_area, n_workers=None):
+    """ generate the tours of all the seeds, in parallel on n_workers processes (all the cpus by default) """
+    from concurrent.futures import ProcessPoolExecutor
+
+    mission_data = {
+        "ndrones": str(ndrones),
+        "autonomy_meters": str(autonomy),
+        "edge_area": str(edge_area)
+    }
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = [pool.submit(save_tours, seed, ndrones, autonomy, depot, edge_area, mission_data) for seed in seeds]
+        return [future.result() for future in futures]
+
+
+"build the tours of the drones for the routing, in the tour store (see src.utilities.tour_store)"
 if __name__ == "__main__":
+    filenames = tours_library(range(0, 50), ndrones=90, autonomy=100000, depot=(750, 0), edge_area=1500)
+    print("Tours saved: ", len(filenames), filenames[0], "...")
 
-    for seed in range(0, 50):
-        # mission info
-        depot = (750, 0)
-        nrounds = 1
-        edge_area = 1500
-        aut = 100000  # meters in our simulation use at least 60000
-        ndrones = 90
-        mission_data = {
-            "ndrones": str(ndrones),
-            "autonomy_meters": str(aut),
-            "edge_area": str(edge_area)
-        }
-        # save = True -> create the json file with the path
-        run(ndrones, nrounds, aut, depot, mission_data, edge_area, seed, plot=False, save=True)
@@ -0,0 +1,75 @@
+import math
+
+from src.utilities import utilities as util
+
+"""
+This file contains the spatial index of the simulator. It is a uniform grid over the area (spatial hash) with cells
+sized as the communication range, it answers "who is within range of X" and "all in-range pairs" by looking only
+at the cells around X, in near linear time with the number of entities.
+"""
+
+
+class SpatialGrid:
+
+    def __init__(self, cell_size):
+        """ cell_size: float, meters, the size of the cells, e.g., the communication range """
+        self.cell_size = cell_size
+        self.cells = {}  # { (x cell, y cell) : [entity, ...] }
+
+    def cell(self, coords):
+        """ the cell in which the coordinates lay """
+        return math.floor(coords[0] / self.cell_size), math.floor(coords[1] / self.cell_size)
+
+    def build(self, entities):
+        """ (re)build the grid with the current coordinates of the entities (e.g. Drone) """
+        self.cells = {}
+        for entity in entities:
+            self.cells.setdefault(self.cell(entity.coords), []).append(entity)
+
+    def candidates(self, coords, radius):
+        """ the entities that may be within radius from coords, sorted by identifier.
+            It is a superset of the entities in range: the coordinates are those at the time of the build,
+            entities that moved since then must be accounted in the radius.
+        """
+        cell_x, cell_y = self.cell(coords)
+        n_cells = max(1, math.ceil(radius / self.cell_size))
+
+        out_entities = []
+        for x in range(cell_x - n_cells, cell_x + n_cells + 1):
+            for y in range(cell_y - n_cells, cell_y + n_cells + 1):
+                out_entities.extend(self.cells.get((x, y), ()))
+
+        out_entities.sort(key=lambda entity: entity.identifier)
+        return out_entities
+
+    def in_range(self, coords, radius, margin=0):
+        """ the (entity, distance) with the entity within radius from coords, sorted by identifier.
+            margin: how much the entities may have moved since the build
+        """
+        out_entities = []
+        for entity in self.candidates(coords, radius + margin):
+            distance = util.euclidean_distance(coords, entity.coords)
+            if distance <= radius:
+                out_entities.append((entity, distance))
+        return out_entities
+
+    def pairs(self, radius):
+        """ all the (entity, entity, distance) within radius, sorted by identifiers, radius <= cell_size """
+        assert radius <= self.cell_size
+
+        out_pairs = []
+        for (cell_x, cell_y), entities in self.cells.items():
+            # the cell itself and half of the cells around, to see each pair once
+            for other_cell in [(cell_x, cell_y), (cell_x + 1, cell_y - 1), (cell_x + 1, cell_y),
+                               (cell_x + 1, cell_y + 1), (cell_x, cell_y + 1)]:
+                for entity in entities:
+                    for other_entity in self.cells.get(other_cell, ()):
+                        if other_cell == (cell_x, cell_y) and other_entity.identifier <= entity.identifier:
+                            continue
+                        distance = util.euclidean_distance(entity.coords, other_entity.coords)
+                        if distance <= radius:
+                            first, second = sorted([entity, other_entity], key=lambda e: e.identifier)
+                            out_pairs.append((first, second, distance))
+
+        out_pairs.sort(key=lambda pair: (pair[0].identifier, pair[1].identifier))
+        return out_pairs
@@ -0,0 +1,119 @@
+from src.utilities import columnar
+from argparse import ArgumentParser
+from ast import literal_eval as make_tuple
+import glob
+import json
+import os
+
+import numpy as np
+
+"""
+This file contains the compiled tours of the drones: the tours of a JSON file (see random_waypoint_generation.to_json)
+parsed once and saved next to it as a columnar .npz (see src.utilities.columnar), with all the waypoints in a single
+(n_waypoints, 2) column and the offsets of the tour of each drone. The columns are memory-mapped, the tour of a drone is
+read only when it is asked for.
+
+e.g. python -m src.utilities.tour_store data/tours/RANDOM_missions*.json
+"""
+
+COMPILED_EXTENSION = ".npz"
+COLUMNS = ["drone_ids", "offsets", "coords"]  # the columns of the compiled tours
+
+
+def compiled_filename(json_file):
+    """ the compiled tours of the json file, e.g. RANDOM_missions1.json -> RANDOM_missions1.npz """
+    return os.path.splitext(json_file)[0] + COMPILED_EXTENSION
+
+
+def parse_json_tours(json_file):
+    """ the tours of the json file { drone_id : list of waypoints } and its info_mission """
+    tours = {}
+    with open(json_file, 'r') as in_file:
+        data = json.load(in_file)
+        for drone_data in data["drones"]:
+            tours[int(drone_data["index"])] = [make_tuple(waypoint) for waypoint in drone_data["tour"]]
+    return tours, data.get("info_mission", {})
+
+
+def save_tours(filename, tours: dict, info_mission=None):
+    """ save the tours { drone_id : list of waypoints } in the compiled format.
+        The waypoints are saved as integers if all of them are integers, as floats otherwise
+    """
+    drone_ids = sorted(tours)
+    lengths = [len(tours[drone_id]) for drone_id in drone_ids]
+    waypoints = [waypoint for drone_id in drone_ids for waypoint in tours[drone_id]]
+
+    integral = all(isinstance(x, (int, np.integer)) for waypoint in waypoints for x in waypoint)
+    coords = np.array(waypoints, dtype=np.int64 if integral else np.float64).reshape(-1, 2)
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+    header = {"info_mission": info_mission if info_mission is not None else {}, "n_drones": len(drone_ids)}
+    columnar.save_columns(filename, header, {"drone_ids": np.array(drone_ids, dtype=np.int64),
+                                             "offsets": offsets, "coords": coords})
+
+
+def compile_tours(json_file):
+    """ parse the json file once and save its compiled tours, return the name of the compiled file """
+    tours, info_mission = parse_json_tours(json_file)
+    filename = compiled_filename(json_file)
+    save_tours(filename, tours, info_mission)
+    return filename
+
+
+def is_compiled(json_file):
+    """ True if the compiled tours of the json file exist, are complete and are not older than it """
+    filename = compiled_filename(json_file)
+    if not columnar.is_complete(filename, COLUMNS):
+        return False
+    return not os.path.exists(json_file) or os.path.getmtime(filename) >= os.path.getmtime(json_file)
+
+
+class TourStore:
+    """ the compiled tours of a file, each tour is read from the memory-mapped columns when asked for """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.header, columns = columnar.load_columns(filename)
+        self.coords = columns["coords"]
+        self.offsets = columns["offsets"]
+        self.index = {drone_id: i for i, drone_id in enumerate(columns["drone_ids"].tolist())}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, drone_id):
+        return drone_id in self.index
+
+    def waypoints(self, drone_id):
+        """ the tour of the drone as a read-only (n_waypoints, 2) array """
+        i = self.index[drone_id]
+        return self.coords[self.offsets[i]:self.offsets[i + 1]]
+
+    def tour(self, drone_id):
+        """ the tour of the drone as a list of tuples (x, y), like the ones parsed from the json """
+        return [tuple(waypoint) for waypoint in self.waypoints(drone_id).tolist()]
+
+    def tours(self):
+        """ all the tours { drone_id : list of waypoints } """
+        return {drone_id: self.tour(drone_id) for drone_id in self.index}
+
+
+def load_tours(json_file):
+    """ the compiled tours of the json file, compiled now if they are missing or older than the json """
+    if not is_compiled(json_file):
+        compile_tours(json_file)
+    return TourStore(compiled_filename(json_file))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("json_files", action="store", type=str, nargs="+",
+                        help="the json files of the tours to compile, e.g. data/tours/RANDOM_missions*.json")
+    parser.add_argument("-f", dest='force', action="store_true",
+                        help="compile the tours even if they are already compiled")
+    args = parser.parse_args()
+
+    for pattern in args.json_files:
+        for json_file in sorted(glob.glob(pattern)):
+            if args.force or not is_compiled(json_file):
+                print("Compiled: ", compile_tours(json_file))
@@ -0,0 +1,68 @@
+import numpy as np
+
+"""
+This file contains the precomputed trajectory of a mission path. The drone flies the path one step at a time, a
+segment of length L takes ceil(L / d) steps (at least one) where d is the distance of a step, and the drone stops on
+the waypoint at the end of the segment. The first step of each segment is cumulated once, so the position along the
+mission at any (future) step is a searchsorted plus one interpolation.
+
+The trajectory is a prediction: Drone.move keeps interpolating step by step, which is the reference of the
+simulation, the two positions can differ by the rounding of the floating point.
+"""
+
+
+class Trajectory:
+
+    def __init__(self, path: list, step_distance: float):
+        """ path: the waypoints of the mission, the mission goes back to the first one after the last one
+            step_distance: the distance flown in a step (speed * time_step_duration)
+        """
+        self.step_distance = step_distance
+        self.starts = np.asarray(path, dtype=float).reshape(-1, 2)
+        self.ends = np.roll(self.starts, -1, axis=0)
+        self.lengths = np.sqrt(((self.ends - self.starts) ** 2).sum(axis=1))
+
+        # the steps of each segment and the step at which each segment begins
+        if step_distance > 0:
+            n_steps = np.maximum(1, np.ceil(self.lengths / step_distance)).astype(np.int64)
+        else:
+            n_steps = np.ones(len(self.starts), dtype=np.int64)
+        self.first_steps = np.concatenate(([0], np.cumsum(n_steps)))
+        self.period = int(self.first_steps[-1])  # the steps of a whole round of the mission
+
+    def __len__(self):
+        return len(self.starts)
+
+    def positions(self, steps):
+        """ the positions (n, 2) at the given steps (array of n, may be fractional) from the start of the mission """
+        steps = np.asarray(steps, dtype=float) % self.period
+        segments = np.searchsorted(self.first_steps, steps, side="right") - 1
+
+        lengths = self.lengths[segments]
+        flown = (steps - self.first_steps[segments]) * self.step_distance
+        ratio = np.divide(flown, lengths, out=np.ones_like(flown), where=lengths > 0)
+        ratio = np.minimum(ratio, 1)[:, None]
+        return (1 - ratio) * self.starts[segments] + ratio * self.ends[segments]
+
+    def position(self, step):
+        """ the position (x, y) at the given step from the start of the mission """
+        return tuple(self.positions([step])[0].tolist())
+
+    def range_entries(self, center, radius):
+        """ for each segment, the steps from its first step to the first one at which the drone is within radius from
+            center (rounded down), -1 if the drone does not enter the disk on the segment
+        """
+        to_center = self.starts - np.asarray(center, dtype=float)
+        c = (to_center ** 2).sum(axis=1) - radius ** 2
+        directions = np.divide(self.ends - self.starts, self.lengths[:, None],
+                               out=np.zeros_like(self.starts), where=self.lengths[:, None] > 0)
+        b = (directions * to_center).sum(axis=1)
+        delta = b * b - c
+
+        # the distances along the segment in the disk: [enter, leave], from the start of the segment
+        sqrt_delta = np.sqrt(np.maximum(delta, 0))
+        enter, leave = np.maximum(0, -b - sqrt_delta), -b + sqrt_delta
+        inside = (delta >= 0) & (enter <= self.lengths) & (leave >= 0)
+        if self.step_distance <= 0:
+            return np.where(inside & (c <= 0), 0, -1)
+        return np.where(inside, np.floor(enter / self.step_distance), -1).astype(np.int64)
@@ -1,17 +1,12 @@
 
 """ To clean. """
 
-from src.utilities import config
-
 import pathlib
 import time
-import json
-import matplotlib.pyplot as plt
-import pandas as pd
 import numpy as np
 import pickle
-from ast import literal_eval as make_tuple
 from src.utilities import random_waypoint_generation
+from src.utilities.trajectory import Trajectory
 
 
 def compute_circle_path(radius : int, center : tuple) -> list:
@@ -77,13 +72,15 @@ class EventGenerator:
 
         :param cur_step: the current step of the simulation to decide whenever sample an event or not
         :param drones: the drones where to sample the event
-        :return: nothing
+        :return: the drone that felt the event, None if no event was generated
         """
         if cur_step % self.simulator.event_generation_delay == 0:  # if it's time to generate a new packet
             # drone that will receive the packet:
             drone_index = self.rnd_drones.randint(0, len(drones))
             drone = drones[drone_index]
             drone.feel_event(cur_step)
+            return drone
+        return None
 
 # ------------------ Path manager ----------------------
 class PathManager:
@@ -96,11 +93,10 @@ class PathManager:
         """
         self.path_from_json = path_from_json
         self.json_file = json_file.format(seed)
+        self.tours = None  # the compiled tours of the json file, loaded at the first path
         if path_from_json:
-            self.path_dict = json_to_paths(self.json_file)
             self.rnd_paths = None
         else:
-            self.path_dict = None
             self.rnd_paths = np.random.RandomState(seed)
 
 
@@ -113,18 +109,29 @@ class PathManager:
             less or more than the simulation.
             In the first case the path should be repeated.
         """
-        if config.DEMO_PATH:  # some demo paths
+        if simulator.config.demo_path:  # some demo paths
             return self.__demo_path(drone_id)
-        if config.CIRCLE_PATH:
+        if simulator.config.circle_path:
             return self.__cirlce_path(drone_id, simulator)
-        elif self.path_from_json:  # paths from loaded json
-            return self.path_dict[drone_id]
+        elif self.path_from_json:  # paths from the compiled json
+            if self.tours is None:
+                from src.utilities import tour_store  # zipfile, only for the paths from json
+                self.tours = tour_store.load_tours(self.json_file)
+            return self.tours.tour(drone_id)
         else:  # generate dynamic paths
             return random_waypoint_generation.get_tour(simulator.drone_max_energy, simulator.env_width,
                                                        simulator.depot_coordinates,
                                                        random_generator=self.rnd_paths,
-                                                       range_decision=config.RANDOM_STEPS,
-                                                       random_starting_point=config.RANDOM_START_POINT)
+                                                       range_decision=simulator.config.random_steps,
+                                                       random_starting_point=simulator.config.random_start_point)
+
+    @staticmethod
+    def trajectory(path, simulator, speed=None):
+        """ the precomputed trajectory of the path (see src.utilities.trajectory), flown at speed
+            (the speed of the drones by default)
+        """
+        speed = simulator.drone_speed if speed is None else speed
+        return Trajectory(path, speed * simulator.time_step_duration)
 
     def __cirlce_path(self, drone_id, simulator, center=None, radius=None):
         if center is None:
@@ -161,17 +168,11 @@ def json_to_paths(json_file_path):
             0 : [(0,0), (2000,2000), (1500, 1500), (200, 2000)],
             1 : [(0,0), (2000, 200), (200, 2000), (1500, 1500)]
         }
+
+        The tours are read from their compiled version (see src.utilities.tour_store), compiled at the first load.
     """
-    out_data = {}
-    with open(json_file_path, 'r') as in_file:
-        data = json.load(in_file)
-        for drone_data in data["drones"]:
-            drone_index = int(drone_data["index"])
-            drone_path = []
-            for waypoint in drone_data["tour"]:
-                drone_path.append(make_tuple(waypoint))
-            out_data[drone_index] = drone_path
-    return out_data
+    from src.utilities import tour_store
+    return tour_store.load_tours(json_file_path).tours()
 
 
 class LimitedList:
@@ -192,12 +193,30 @@ class LimitedList:
         return self.llist[index]
 
 
+class IdAllocator:
+    """ Sequential integer ids (0, 1, 2...), unique within a simulation and the same in repeated runs """
+    def __init__(self):
+        self.next_id = 0
+
+    def next(self):
+        identifier = self.next_id
+        self.next_id += 1
+        return identifier
+
+    def __len__(self):
+        """ the number of ids allocated so far """
+        return self.next_id
+
+
 def make_path(fname):
     path = pathlib.Path(fname)
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
 def plot_X(X, plt_title, plt_path, window_size=30, is_avg=True):
+    import matplotlib.pyplot as plt  # imported here, the headless simulations don't need it
+    import pandas as pd
+
     if len(X) >= window_size:
         df = pd.Series(X)
         scatter_print = X[window_size:]
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from src.experiments import campaign
+
+CRASHING_SEED = 3
+
+
+def fake_job(path_filename, n_drones, seed, algorithm_routing, cache=None):
+    """ log the run and return the seed as the score, the CRASHING_SEED kills its worker and "ERR" raises """
+    with open(os.path.join(path_filename, "runs.log"), "a") as f:
+        f.write(str(seed) + "\n")
+    if seed == CRASHING_SEED:
+        os._exit(1)
+    if algorithm_routing == "ERR":
+        raise ValueError("bad job")
+    return float(seed)
+
+
+def runs(path_filename):
+    """ how many times each seed was run """
+    with open(os.path.join(path_filename, "runs.log")) as f:
+        seeds = [int(line) for line in f]
+    return {seed: seeds.count(seed) for seed in set(seeds)}
+
+
+@pytest.fixture
+def fake_campaign(monkeypatch):
+    monkeypatch.setattr(campaign, "run_job", fake_job)
+
+
+@pytest.mark.parametrize("max_attempts", [1, 3])
+def test_only_the_crashing_job_is_charged(fake_campaign, tmp_path, max_attempts):
+    jobs = [(5, seed, "RND") for seed in range(8)]
+    scores, failed = campaign.run_campaign(str(tmp_path), jobs, n_workers=2, max_attempts=max_attempts)
+
+    assert scores == {job: float(job[1]) for job in jobs if job[1] != CRASHING_SEED}
+    assert failed == {(5, CRASHING_SEED, "RND"): "the worker died " + str(max_attempts) + " times"}
+    # once in the pool, then alone for each attempt
+    assert runs(str(tmp_path))[CRASHING_SEED] == 1 + max_attempts
+    assert all(count <= 2 for seed, count in runs(str(tmp_path)).items() if seed != CRASHING_SEED)
+
+
+def test_exceptions_are_not_retried(fake_campaign, tmp_path):
+    jobs = [(5, 0, "RND"), (5, 1, "ERR")]
+    scores, failed = campaign.run_campaign(str(tmp_path), jobs, n_workers=2)
+
+    assert scores == {(5, 0, "RND"): 0.0}
+    assert failed == {(5, 1, "ERR"): repr(ValueError("bad job"))}
+    assert runs(str(tmp_path)) == {0: 1, 1: 1}
@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.routing_algorithms import channel_model
+from src.simulation.simulator import Simulator
+from src.utilities import config
+
+DISTANCES = [0, 12.5, 80, 99.9, 100, 150, 199.99, 7, 120]
+
+
+def simulator(error_type):
+    return Simulator(show_plot=False, n_drones=5, seed=4, drone_com_range=200, communication_error_type=error_type)
+
+
+def test_success_draws_as_single_transmissions():
+    for error_type in (config.ChannelError.GAUSSIAN, config.ChannelError.UNIFORM, config.ChannelError.NO_ERROR):
+        sim = simulator(error_type)
+        model, routing = sim.channel_model, sim.drones[0].routing_algorithm
+        state = sim.rnd_routing.get_state()
+
+        # the per-call computation of the routing algorithms, one random number per transmission
+        single = [routing.channel_success(distance) for distance in DISTANCES]
+        after_single = sim.rnd_routing.rand()
+
+        sim.rnd_routing.set_state(state)
+        assert model.success(DISTANCES).tolist() == single
+        assert sim.rnd_routing.rand() == after_single
+
+
+def test_gaussian_buckets_as_scipy():
+    from scipy.stats import norm
+
+    for communication_range in (50, 200, 333, 1000):
+        sigma = communication_range * 1.15
+        radius_corona, probabilities = channel_model.gaussian_buckets(communication_range)
+        max_prob = norm.cdf(radius_corona, loc=0, scale=sigma) - norm.cdf(0, loc=0, scale=sigma)
+        expected = [(norm.cdf(bk + radius_corona, loc=0, scale=sigma) - norm.cdf(bk, loc=0, scale=sigma)) / max_prob
+                    for bk in range(0, communication_range, radius_corona)]
+        assert np.allclose(probabilities, expected, rtol=1e-12, atol=0)
@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.utilities import columnar
+
+
+def test_roundtrip(tmp_path):
+    filename = str(tmp_path / "columns.npz")
+    header = {"score": 1.5, "mission_setup": {"n_drones": 3}}
+    rows = [[float(i), float(-i)] for i in range(10)]
+    columnar.save_columns(filename, header, {
+        "ints": np.arange(7, dtype=np.int64),
+        "empty": np.empty((0, 2)),
+        "chunked": columnar.Column(float, (10, 2), columnar.chunks(rows, float, chunk_rows=3)),
+        "chunked_empty": columnar.Column(np.int64, (0,), columnar.chunks([], np.int64))})
+
+    loaded_header, columns = columnar.load_columns(filename)
+    assert loaded_header == header == columnar.load_header(filename)
+    assert np.array_equal(columns["ints"], np.arange(7)) and columns["ints"].dtype == np.int64
+    assert columns["empty"].shape == (0, 2)
+    assert np.array_equal(columns["chunked"], np.array(rows)) and columns["chunked"].dtype == float
+    assert columns["chunked_empty"].shape == (0,) and columns["chunked_empty"].dtype == np.int64
+
+    # and the file is a plain npz for numpy
+    with np.load(filename) as npz:
+        assert np.array_equal(npz["chunked"], np.array(rows))
+
+
+def test_chunks_must_match_the_shape(tmp_path):
+    column = columnar.Column(np.int64, (5,), columnar.chunks(range(4), np.int64, chunk_rows=2))
+    with pytest.raises(AssertionError):
+        columnar.save_columns(str(tmp_path / "columns.npz"), {}, {"short": column})
+
+
+def test_failed_save_keeps_the_previous_file(tmp_path):
+    filename = str(tmp_path / "columns.npz")
+    columnar.save_columns(filename, {"version": 1}, {"ints": np.arange(3)})
+
+    column = columnar.Column(np.int64, (5,), columnar.chunks(range(4), np.int64))
+    with pytest.raises(AssertionError):
+        columnar.save_columns(filename, {"version": 2}, {"short": column})
+
+    assert os.listdir(tmp_path) == ["columns.npz"]
+    assert columnar.is_complete(filename, ["ints"]) and columnar.load_header(filename) == {"version": 1}
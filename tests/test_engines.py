@@ -0,0 +1,79 @@
+from enum import Enum
+
+import pytest
+
+from src.simulation.simulator import Simulator
+from src.simulation.simulation_config import SimulationConfig
+from src.routing_algorithms.random_routing import RandomRouting
+from src.utilities import config
+
+
+class MoveRouting(RandomRouting):
+    """ a random relay, but the drone goes to the depot once it carries more than one packet: it exercises the
+        move routing and the coming back to the mission """
+
+    def relay_selection(self, opt_neighbors):
+        if self.drone.buffer_length() > 1:
+            self.drone.move_routing = True
+        return RandomRouting.relay_selection(self, opt_neighbors)
+
+
+class ExtraRouting(Enum):
+    MOV = MoveRouting
+
+
+SCENARIOS = {"rnd": dict(routing_algorithm=config.RoutingAlgorithm.RND, n_drones=15, seed=3, len_simulation=2000),
+             "geo": dict(routing_algorithm=config.RoutingAlgorithm.GEO, n_drones=20, seed=3, len_simulation=3000),
+             "move": dict(routing_algorithm=ExtraRouting.MOV, n_drones=30, seed=3, len_simulation=3000),
+             "move_no_error": dict(routing_algorithm=ExtraRouting.MOV, n_drones=20, seed=3, len_simulation=2000,
+                                   communication_error_type=config.ChannelError.NO_ERROR)}
+
+# the final metrics of the stepped engine of the original simulator (before any engine was added)
+STEPPED_BASELINE = {"rnd": dict(score=2655.3548387096776, packets_to_depot=6, control_packets=90877, data_packets=1401,
+                                time_on_mission=30000, time_on_active_routing=0),
+                    "geo": dict(score=2637.7659574468084, packets_to_depot=8, control_packets=240000, data_packets=8,
+                                time_on_mission=60000, time_on_active_routing=0),
+                    "move": dict(score=1979.340425531915, packets_to_depot=47, control_packets=545172,
+                                 data_packets=7363, time_on_mission=70960, time_on_active_routing=30585),
+                    "move_no_error": dict(score=1709.0645161290322, packets_to_depot=17, control_packets=161761,
+                                          data_packets=2212, time_on_mission=37415, time_on_active_routing=4389)}
+
+# the engines, by the config that enables them
+ENGINES = {"stepped": {},
+           "vectorized": {"vectorized_drones": True},
+           "discrete_events": {"discrete_events": True}}
+
+
+def run(scenario, engine):
+    simulation = Simulator(show_plot=False,
+                           simulation_config=SimulationConfig.from_module(**ENGINES[engine]), **SCENARIOS[scenario])
+    simulation.run()
+    metrics = simulation.metrics
+    score = metrics.score()
+    metrics.other_metrics()
+    return {"score": float(score),
+            "packets_to_depot": metrics.number_of_packets_to_depot,
+            "control_packets": metrics.all_control_packets_in_simulation,
+            "data_packets": metrics.all_data_packets_in_simulation,
+            "time_on_mission": metrics.time_on_mission,
+            "time_on_active_routing": metrics.time_on_active_routing,
+            "event_delivery_times": sorted(metrics.event_delivery_times),
+            "coords": [tuple(drone.coords) for drone in simulation.drones]}
+
+
+@pytest.fixture(scope="module")
+def stepped_results():
+    return {scenario: run(scenario, "stepped") for scenario in SCENARIOS}
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_stepped_engine_matches_the_baseline(stepped_results, scenario):
+    results = stepped_results[scenario]
+    assert {name: results[name] for name in STEPPED_BASELINE[scenario]} == STEPPED_BASELINE[scenario]
+
+
+@pytest.mark.parametrize("engine", [engine for engine in ENGINES if engine != "stepped"])
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_engine_matches_the_stepped_engine(stepped_results, scenario, engine):
+    # the same metrics and the very same coordinates, not within a tolerance
+    assert run(scenario, engine) == stepped_results[scenario]
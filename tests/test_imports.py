@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+import pytest
+
+ROOT = __file__.rsplit("/tests/", 1)[0]
+
+# the modules that can be the first one imported by a script, in a fresh python
+ENTRY_MODULES = ["src.main",
+                 "src.simulation.simulator",
+                 "src.simulation.metrics",
+                 "src.simulation.event_scheduler",
+                 "src.entities.uav_entities",
+                 "src.entities.drones_state",
+                 "src.routing_algorithms.net_routing",
+                 "src.routing_algorithms.channel_model",
+                 "src.experiments.campaign",
+                 "src.experiments.benchmark"]
+
+
+@pytest.mark.parametrize("module", ENTRY_MODULES)
+def test_import_first(module):
+    completed = subprocess.run([sys.executable, "-c", "import " + module], cwd=ROOT, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+
+
+def test_headless_simulator_does_not_load_the_heavy_backends():
+    code = ("import sys\n"
+            "from src.simulation.simulator import Simulator\n"
+            "Simulator(show_plot=False)\n"
+            "print('pygame' in sys.modules, 'matplotlib' in sys.modules, 'scipy' in sys.modules)")
+    completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.split() == ["False", "False", "False"]
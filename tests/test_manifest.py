@@ -0,0 +1,35 @@
+import os
+
+from src.experiments.manifest import CampaignManifest, parameters_key
+from src.utilities import config
+
+
+def test_parameters_key():
+    parameters = {"n_drones": 5, "seed": 1, "routing_algorithm": config.RoutingAlgorithm.RND}
+    # the defaults are part of the key, the ui parameters are not
+    defaults = {**parameters, "len_simulation": config.SIM_DURATION, "show_plot": False}
+    assert parameters_key(parameters) == parameters_key(defaults)
+    assert parameters_key(parameters) != parameters_key({**parameters, "seed": 2})
+
+
+def test_done_only_while_the_results_are_unchanged(tmp_path):
+    results = str(tmp_path / "results.json")
+    with open(results, "w") as f:
+        f.write("{}")
+
+    manifest = CampaignManifest(str(tmp_path))
+    manifest.record_done("done", (5, 1, "RND"), results, 12.5)
+    manifest.record_failed("failed", (5, 2, "RND"), "error")
+
+    # the manifest is read back from disk, a line truncated by a crash is skipped
+    with open(manifest.filename, "a") as f:
+        f.write('{"key": "trunc')
+    manifest = CampaignManifest(str(tmp_path))
+    assert manifest.is_done("done") and manifest.score("done") == 12.5
+    assert not manifest.is_done("failed") and not manifest.is_done("missing")
+
+    with open(results, "w") as f:
+        f.write("{ }")
+    assert not manifest.is_done("done")
+    os.remove(results)
+    assert not manifest.is_done("done")
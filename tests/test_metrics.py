@@ -0,0 +1,62 @@
+import json
+import os
+
+from src.simulation.simulator import Simulator
+from src.simulation.simulation_config import SimulationConfig
+from src.utilities import config
+
+
+def simulation(log_dir, streaming, name=None):
+    sim = Simulator(show_plot=False, n_drones=10, seed=2, len_simulation=1500,
+                    routing_algorithm=config.RoutingAlgorithm.RND,
+                    simulation_config=SimulationConfig.from_module(streaming_metrics=streaming,
+                                                                   metrics_log_dir=str(log_dir) + "/"))
+    if name is not None:
+        sim.simulation_name = name
+    sim.run()
+    return sim
+
+
+def saved(sim, filename):
+    sim.metrics.save_as_json(filename)
+    with open(filename) as f:
+        return json.load(f)
+
+
+def test_streaming_metrics_save_the_same_metrics(tmp_path):
+    memory = saved(simulation(tmp_path, False), str(tmp_path / "memory.json"))
+    streaming = saved(simulation(tmp_path, True), str(tmp_path / "streaming.json"))
+
+    assert memory.pop("drones_packets_ttl") == "final" and streaming.pop("drones_packets_ttl") == "generation"
+    memory_packets, streaming_packets = memory.pop("drones_packets"), streaming.pop("drones_packets")
+    assert [{**packet, "TTL": -1} for packet in sorted(memory_packets, key=lambda p: p["id"])] \
+        == sorted(streaming_packets, key=lambda p: p["id"])
+
+    for name in ["all_events", "not_listened_events", "drones_to_depot_packets", "events_delivery_times"]:
+        memory[name], streaming[name] = sorted(map(str, memory[name])), sorted(map(str, streaming[name]))
+    assert memory == streaming
+
+
+def test_streaming_logs_are_unique_and_deleted(tmp_path):
+    # the same name, in the same process
+    first, second = simulation(tmp_path, True, "same"), simulation(tmp_path, True, "same")
+    assert first.metrics.log_filename != second.metrics.log_filename
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(sim.metrics.log_filename) for sim in (first, second))
+
+    first.metrics.close()
+    second.metrics.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_depot_packets_are_counted_once(tmp_path):
+    sim = Simulator(show_plot=False, n_drones=10, seed=2, len_simulation=1500,
+                    routing_algorithm=config.RoutingAlgorithm.RND,
+                    simulation_config=SimulationConfig.from_module(root_evaluation_data=str(tmp_path) + "/"))
+    sim.simulation_name = "once"
+    sim.run()
+    sent = sim.metrics.all_data_packets_in_simulation
+    assert sim.metrics.n_packets_to_depot > 0
+
+    sim.close()  # prints and saves the metrics, both evaluate other_metrics
+    with open(str(tmp_path / "once.json")) as f:
+        assert json.load(f)["all_data_packets_in_simulation"] == sent + sim.metrics.n_packets_to_depot
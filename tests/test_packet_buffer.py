@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.entities.uav_entities import PacketBuffer
+
+
+def packet(event_id, deadline):
+    return SimpleNamespace(event_ref=SimpleNamespace(identifier=event_id, deadline=deadline))
+
+
+def test_expiry_and_tightest_deadline():
+    buffer = PacketBuffer()
+    assert np.isnan(buffer.tightest_deadline())
+
+    packets = [packet(0, 30), packet(1, 10), packet(2, 20), packet(3, 10)]
+    for p in packets:
+        buffer.add(p)
+    assert len(buffer) == 4 and buffer.tightest_deadline() == 10
+    assert buffer.all_packets() == packets  # in insertion order
+
+    # expired: the deadline is before the step
+    assert buffer.remove_expired(10) == 0
+    assert buffer.remove_expired(11) == 2
+    assert buffer.all_packets() == [packets[0], packets[2]] and buffer.tightest_deadline() == 20
+
+
+def test_removed_and_replaced_packets_are_lazily_deleted():
+    buffer = PacketBuffer()
+    first, second, third = packet(0, 10), packet(1, 20), packet(2, 30)
+    for p in (first, second, third):
+        buffer.add(p)
+
+    # a removed packet stays in the heap, but it is neither the tightest deadline nor expired again
+    buffer.remove(first)
+    assert first not in buffer and not buffer.is_known(first)
+    assert buffer.tightest_deadline() == 20
+    assert buffer.remove_expired(25) == 1 and buffer.all_packets() == [third]
+
+    # a packet of the same event replaces the old one, with its own deadline
+    newer = packet(2, 40)
+    buffer.add(newer)
+    assert buffer.is_known(third) and third not in buffer and newer in buffer
+    assert buffer.remove_expired(35) == 0 and buffer.all_packets() == [newer]
+    assert buffer.tightest_deadline() == 40
+
+    buffer.clear()
+    assert len(buffer) == 0 and np.isnan(buffer.tightest_deadline())
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from src.simulation.profiler import PHASES
+from src.simulation.simulator import Simulator
+from src.simulation.simulation_config import SimulationConfig
+from src.utilities import config
+
+
+def test_report_of_the_phases(tmp_path, capsys):
+    sim = Simulator(show_plot=False, n_drones=5, seed=1, len_simulation=500,
+                    routing_algorithm=config.RoutingAlgorithm.RND,
+                    simulation_config=SimulationConfig.from_module(profile_sim=True))
+    sim.run()
+    report = sim.profiler.report()
+    phases = report["phases"]
+
+    assert report["steps"] == 500 and report["total_seconds"] > 0
+    assert phases["geometry"]["calls"] == 2 * 500  # the build of the grid and the refresh of the cache
+    assert phases["update_packets"]["calls"] == phases["routing"]["calls"] == 5 * 500
+    assert phases["move"]["calls"] == 5 * 500
+
+    # the top level phases and the rest of the loop make the whole run
+    top = sum(stats["seconds"] for name, stats in phases.items() if stats["parent"] is None)
+    assert top == pytest.approx(report["total_seconds"])
+    assert sum(stats["share"] for stats in phases.values() if stats["parent"] is None) == pytest.approx(1)
+    for name, parent in PHASES:
+        if parent is not None:
+            assert phases[name]["seconds"] <= phases[parent]["seconds"]
+
+    printed = capsys.readouterr().out
+    assert all(name in printed for name in phases)
+
+    sim.profiler.save(str(tmp_path / "profile.json"))
+    with open(tmp_path / "profile.json") as f:
+        assert json.load(f) == report
@@ -0,0 +1,13 @@
+import numpy as np
+
+from src.utilities import random_waypoint_generation
+
+
+def test_batch_tours_are_those_of_get_tour():
+    for seed in range(5):
+        tours = random_waypoint_generation.batch_tours(10, 100000, 1500, (750, 0), np.random.RandomState(seed))
+
+        random_generator = np.random.RandomState(seed)
+        for i in range(10):
+            tour = random_waypoint_generation.get_tour(100000, 1500, (750, 0), random_generator)
+            assert tours[i] == tour + [tour[-1]]
@@ -0,0 +1,43 @@
+import json
+import os
+
+from src.experiments.result_cache import ResultCache, simulation_key
+from src.simulation.simulation_config import SimulationConfig
+from src.utilities import config
+
+
+def write(filename, size):
+    """ metrics of the given size in bytes, their score is the size """
+    with open(filename, "w") as f:
+        f.write(json.dumps({"score": size}).ljust(size))
+    return filename
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_size=250)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, write(str(tmp_path / (key + ".json")), 100))
+        os.utime(cache.get(key), (i, i))  # a older than b, older than c
+
+    # 300 bytes > 250: a, the least recently used, is evicted by the put of c
+    assert cache.get("a") is None and cache.get("b") is not None and cache.get("c") is not None
+
+    os.utime(cache.get("b"), (0, 0))  # now b is the least recently used
+    cache.put("d", write(str(tmp_path / "d.json"), 100))
+    assert cache.get("b") is None and cache.get("c") is not None
+
+    out_filename = str(tmp_path / "out.json")
+    assert cache.load("d", out_filename) == {"score": 100} and os.path.getsize(out_filename) == 100
+    assert cache.load("a", out_filename) is None
+
+
+def test_simulation_key(tmp_path):
+    parameters = {"n_drones": 5, "seed": 1, "routing_algorithm": config.RoutingAlgorithm.RND}
+    assert simulation_key(parameters) == simulation_key({**parameters, "show_plot": False})
+    assert simulation_key(parameters) != simulation_key({**parameters, "seed": 2})
+
+    # the fields of the config that don't change the results don't change the key
+    ui = SimulationConfig.from_module(debug=True, state_hash_dir=str(tmp_path))
+    assert simulation_key({**parameters, "simulation_config": ui}) == simulation_key(parameters)
+    engine = SimulationConfig.from_module(hello_delay=config.HELLO_DELAY + 1)
+    assert simulation_key({**parameters, "simulation_config": engine}) != simulation_key(parameters)
@@ -0,0 +1,30 @@
+import json
+import os
+
+from src.experiments.results_store import ResultsStore
+
+
+def write(filename, score, coords, mtime):
+    with open(filename, "w") as f:
+        json.dump({"score": score, "mission_setup": {"n_drones": 2}, "drones_packets": [{"coord": c} for c in coords]}, f)
+    os.utime(filename, (mtime, mtime))
+
+
+def test_results_are_parsed_again_when_the_file_changes(tmp_path):
+    results = str(tmp_path / "out.json")
+    write(results, 1.5, [[1.0, 2.0]], 1000)
+    store = ResultsStore(str(tmp_path / "store.sqlite"))
+    assert store.metrics(results) == {"score": 1.5}
+    assert store.coverage(results) == ([1.0], [2.0])
+
+    # same size, new mtime: parsed again, and the coverage replaced
+    write(results, 2.5, [[3.0, 4.0]], 2000)
+    assert store.metrics(results) == {"score": 2.5}
+    assert store.coverage(results) == ([3.0], [4.0])
+
+    # a new store reads the results of the database, until the file changes
+    store = ResultsStore(str(tmp_path / "store.sqlite"))
+    assert store.metrics(results) == {"score": 2.5}
+    write(results, 3.5, [[5.0, 6.0], [7.0, 8.0]], 2000)
+    assert store.metrics(results) == {"score": 3.5}
+    assert store.coverage(results) == ([5.0, 7.0], [6.0, 8.0])
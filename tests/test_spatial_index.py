@@ -0,0 +1,46 @@
+import random
+from types import SimpleNamespace
+
+from src.utilities import utilities as util
+from src.utilities.spatial_index import SpatialGrid
+
+
+def entities(n, edge, seed):
+    rnd = random.Random(seed)
+    return [SimpleNamespace(identifier=i, coords=(rnd.uniform(0, edge), rnd.uniform(0, edge))) for i in range(n)]
+
+
+def test_in_range_and_pairs_as_brute_force():
+    drones = entities(200, 1500, 1)
+    grid = SpatialGrid(200)
+    grid.build(drones)
+
+    for radius in [50, 200, 450]:
+        for drone in drones[:20]:
+            brute = [(other, util.euclidean_distance(drone.coords, other.coords)) for other in drones
+                     if util.euclidean_distance(drone.coords, other.coords) <= radius]
+            assert grid.in_range(drone.coords, radius) == brute
+            # the candidates are a superset of the entities in range, sorted by identifier
+            candidates = grid.candidates(drone.coords, radius)
+            assert set(map(id, candidates)) >= {id(other) for other, _ in brute}
+            assert [c.identifier for c in candidates] == sorted(c.identifier for c in candidates)
+
+    for radius in [50, 200]:
+        brute = [(first, second, util.euclidean_distance(first.coords, second.coords))
+                 for i, first in enumerate(drones) for second in drones[i + 1:]
+                 if util.euclidean_distance(first.coords, second.coords) <= radius]
+        assert grid.pairs(radius) == brute
+
+
+def test_negative_coordinates_and_margin():
+    drones = entities(50, 300, 2)
+    grid = SpatialGrid(100)
+    grid.build(drones)
+
+    # a query from outside the area, the entities moved 30 m since the build
+    for drone in drones:
+        drone.coords = (drone.coords[0] - 30, drone.coords[1])
+    center = (-40, -10)
+    brute = [(d, util.euclidean_distance(center, d.coords)) for d in drones
+             if util.euclidean_distance(center, d.coords) <= 150]
+    assert grid.in_range(center, 150, margin=30) == brute
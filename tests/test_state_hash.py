@@ -0,0 +1,31 @@
+from src.simulation.simulator import Simulator
+from src.simulation.simulation_config import SimulationConfig
+from src.simulation import state_hash
+from src.utilities import config
+
+
+def simulation(hash_dir, **engine):
+    sim = Simulator(show_plot=False, n_drones=10, seed=2, len_simulation=1000,
+                    routing_algorithm=config.RoutingAlgorithm.RND, simulation_name="same",
+                    simulation_config=SimulationConfig.from_module(state_hash_delay=100,
+                                                                   state_hash_dir=str(hash_dir) + "/", **engine))
+    sim.run()
+    return sim
+
+
+def test_runs_with_the_same_name_have_their_own_hashes(tmp_path):
+    stepped, discrete = simulation(tmp_path), simulation(tmp_path, discrete_events=True)
+    assert stepped.state_hasher.filename != discrete.state_hasher.filename
+
+    assert len(state_hash.read_hashes(stepped.state_hasher.filename)) == 10
+    assert state_hash.first_divergence(stepped.state_hasher.filename, discrete.state_hasher.filename) == (None, [])
+
+
+def test_the_generator_of_the_events_is_hashed(tmp_path):
+    sim = Simulator(show_plot=False, n_drones=10, seed=2, len_simulation=1000,
+                    routing_algorithm=config.RoutingAlgorithm.RND,
+                    simulation_config=SimulationConfig.from_module(state_hash_delay=100,
+                                                                   state_hash_dir=str(tmp_path) + "/"))
+    rng_hash = state_hash.digest(sim.state_hasher.rng_state())
+    sim.event_generator.rnd_drones.randint(0, 10)
+    assert state_hash.digest(sim.state_hasher.rng_state()) != rng_hash
@@ -0,0 +1,40 @@
+import json
+import os
+
+from src.utilities import tour_store
+
+TOURS = {0: [(0, 0), (10, 20), (30, 40)], 1: [(5, 5)], 2: [(1, 2), (3, 4)]}
+
+
+def write_json(filename, tours):
+    data = {"info_mission": {"seed": 7}, "drones": [{"index": i, "tour": [str(waypoint) for waypoint in tour]}
+                                                    for i, tour in tours.items()]}
+    with open(filename, "w") as f:
+        json.dump(data, f)
+
+
+def test_roundtrip(tmp_path):
+    json_file = str(tmp_path / "missions.json")
+    write_json(json_file, TOURS)
+    assert not tour_store.is_compiled(json_file)
+
+    store = tour_store.load_tours(json_file)
+    assert tour_store.is_compiled(json_file)
+    assert store.tours() == TOURS and len(store) == 3 and 1 in store
+    assert store.header["info_mission"] == {"seed": 7}
+    assert sorted(os.listdir(tmp_path)) == ["missions.json", "missions.npz"]  # no temporary file left
+
+
+def test_partial_file_is_not_compiled(tmp_path):
+    json_file = str(tmp_path / "missions.json")
+    write_json(json_file, TOURS)
+    filename = tour_store.compile_tours(json_file)
+
+    # e.g. a process killed while it was writing the file
+    with open(filename, "rb") as f:
+        data = f.read()
+    with open(filename, "wb") as f:
+        f.write(data[:len(data) // 2])
+
+    assert not tour_store.is_compiled(json_file)
+    assert tour_store.load_tours(json_file).tours() == TOURS
@@ -0,0 +1,41 @@
+import math
+
+from src.simulation.simulator import Simulator
+
+STEPS = [1, 7, 100, 1000, 3000]
+
+
+def fly(sim, steps):
+    for _ in range(steps):
+        for drone in sim.drones:
+            drone.move(sim.time_step_duration)
+
+
+def assert_future_positions(sim, steps):
+    """ the predicted positions are those of the steps flown by Drone.move, up to the rounding """
+    predictions = {k: [drone.future_position(k) for drone in sim.drones] for k in steps}
+    for k in range(1, max(steps) + 1):
+        fly(sim, 1)
+        for drone, prediction in zip(sim.drones, predictions.get(k, ())):
+            assert math.dist(drone.coords, prediction) < 1e-6
+
+
+def test_future_position_on_the_mission():
+    for seed in range(1, 4):
+        sim = Simulator(show_plot=False, n_drones=10, seed=seed)
+        fly(sim, 37)
+        assert_future_positions(sim, STEPS)
+
+
+def test_future_position_to_the_depot_and_back_to_the_mission():
+    sim = Simulator(show_plot=False, n_drones=10, seed=1)
+    fly(sim, 37)
+    for drone in sim.drones:
+        drone.move_routing = True
+    assert_future_positions(sim, [1, 5, 20])
+
+    for drone in sim.drones:
+        drone.move_routing = False
+    fly(sim, 1)  # the drones start to go back to the mission
+    assert all(drone.come_back_to_mission for drone in sim.drones)
+    assert_future_positions(sim, STEPS)
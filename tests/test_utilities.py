@@ -0,0 +1,24 @@
+from src.simulation.simulator import Simulator
+from src.utilities import config
+from src.utilities.utilities import IdAllocator
+
+
+def test_sequential_ids():
+    ids = IdAllocator()
+    assert [ids.next() for _ in range(5)] == [0, 1, 2, 3, 4] and len(ids) == 5
+
+
+def test_ids_of_each_simulator():
+    def run():
+        sim = Simulator(show_plot=False, n_drones=5, seed=1, len_simulation=1000,
+                        routing_algorithm=config.RoutingAlgorithm.RND)
+        sim.run()
+        return sim
+
+    # two simulators in the same process: the ids of each start from 0, the second run is the same as the first
+    first, second = run(), run()
+    assert len(first.event_ids) > 0 and len(first.packet_ids) > 0
+    assert (len(first.event_ids), len(first.packet_ids)) == (len(second.event_ids), len(second.packet_ids))
+    events = sorted(ev.identifier for ev in first.metrics.events)
+    assert events == list(range(len(events)))
+    assert sorted(ev.identifier for ev in second.metrics.events) == events